@@ -0,0 +1,337 @@
+import os, re, sys, json, types, struct, marshal, hashlib, argparse, threading, importlib.util
+import http.client, urllib.request
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Cache artefak content-addressed yang dipakai bersama oleh build agent: kunci = hash source +
+# tag interpreter + level optimize, nilai = bytecode hasil compile. Agent pertama yang build
+# sebuah commit membayar biaya compile, agent berikutnya cukup mengambil hasilnya.
+
+DEFAULT_MAX_BYTES = 1 << 30 # 1 GiB per folder cache
+BATCH_SIZE = 256 # kunci per request lookup / artefak per upload
+HTTP_TIMEOUT = 10.0
+FRAME = struct.Struct(">32sI") # kunci (sha256 mentah) + panjang artefak
+SIZE_UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+
+def interpreter_tag(cache_tag=None, magic=None):
+    """cpython-311-a70d0d0a: cache tag plus bytecode magic, so interpreter patch builds with a new magic never mix."""
+    return f"{cache_tag or sys.implementation.cache_tag}-{magic or importlib.util.MAGIC_NUMBER.hex()}"
+
+def artifact_key(source_sha256, tag, optimize):
+    return hashlib.sha256(f"{source_sha256}:{tag}:{optimize}".encode("ascii")).hexdigest()
+
+def parse_size(text):
+    """'512M' -> 536870912; plain numbers are bytes."""
+    match = re.fullmatch(r"\s*(\d+)\s*([KMG]?)i?B?\s*", str(text), re.IGNORECASE)
+    if not match:
+        raise ValueError(f"ukuran tidak valid: {text}")
+    return int(match.group(1)) * SIZE_UNITS[match.group(2).upper()]
+
+def relocate(code, filename):
+    """Returns code (and every nested code object) with co_filename set to filename."""
+    consts = tuple(relocate(c, filename) if isinstance(c, types.CodeType) else c for c in code.co_consts)
+    return code.replace(co_filename=filename, co_consts=consts)
+
+def pack_artifact(filename, code_bytes):
+    """Artifact value: the file name the code was compiled under, NUL, then marshal bytes."""
+    return filename.encode("utf-8") + b"\0" + code_bytes
+
+def load_artifact(value, filename):
+    """Returns (code, marshal bytes) of an artifact, relocated to filename.
+
+    When the artifact was compiled under the same path (agents sharing a checkout layout)
+    the stored bytes are used as-is, byte-identical to a local compile. Otherwise co_filename
+    is rewritten, which gives equivalent but not byte-identical bytecode. Raises ValueError
+    on a damaged artifact.
+    """
+    stored, sep, code_bytes = value.partition(b"\0")
+    if not sep:
+        raise ValueError("artefak tanpa nama file")
+    try:
+        code = marshal.loads(code_bytes)
+    except (EOFError, TypeError) as e:
+        raise ValueError(f"artefak rusak: {e}")
+    if not isinstance(code, types.CodeType):
+        raise ValueError("artefak bukan code object")
+    if stored.decode("utf-8", "replace") == filename:
+        return code, code_bytes
+    code = relocate(code, filename)
+    return code, marshal.dumps(code)
+
+def pack_frames(items):
+    """{hex key: bytes} -> key/length framed body (hits only); shared by the server and HttpBackend."""
+    return b"".join(FRAME.pack(bytes.fromhex(key), len(value)) + value for key, value in items.items())
+
+def unpack_frames(body):
+    items = {}
+    pos = 0
+    while pos + FRAME.size <= len(body):
+        key, size = FRAME.unpack_from(body, pos)
+        pos += FRAME.size
+        if pos + size > len(body):
+            raise ValueError("frame artefak terpotong")
+        items[key.hex()] = body[pos:pos + size]
+        pos += size
+    return items
+
+class DirectoryBackend:
+    """Artifacts as files under root/<2 hex>/<key>, evicted least-recently-used past max_bytes.
+
+    A hit refreshes the file's mtime, so mtime order is LRU order even on noatime mounts.
+    The folder may be shared (NFS, a mounted volume); writes are atomic (temp + rename).
+    """
+
+    def __init__(self, root, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._size = None # perkiraan total; dihitung ulang saat trim
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def get_many(self, keys):
+        found = {}
+        for key in keys:
+            path = self.path(key)
+            try:
+                with open(path, "rb") as f:
+                    found[key] = f.read()
+                os.utime(path)
+            except OSError:
+                continue
+        return found
+
+    def put_many(self, items):
+        added = 0
+        for key, value in items.items():
+            path = self.path(key)
+            if os.path.exists(path):
+                os.utime(path)
+                continue
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(value)
+            os.replace(tmp_path, path)
+            added += len(value)
+        with self._lock:
+            if self._size is None:
+                self._size = self.stats()["bytes"]
+            else:
+                self._size += added
+            over = self._size > self.max_bytes
+        if over:
+            self.trim()
+
+    def _files(self):
+        for sub in os.listdir(self.root):
+            folder = os.path.join(self.root, sub)
+            if len(sub) == 2 and os.path.isdir(folder):
+                for name in os.listdir(folder):
+                    if not name.endswith(".tmp"):
+                        yield os.path.join(folder, name)
+
+    def stats(self):
+        count = size = 0
+        for path in self._files():
+            try:
+                size += os.path.getsize(path)
+                count += 1
+            except OSError:
+                pass
+        return {"artifacts": count, "bytes": size, "max_bytes": self.max_bytes}
+
+    def trim(self):
+        """Deletes least-recently-used artifacts until the folder fits in max_bytes; returns the count."""
+        with self._lock:
+            files = []
+            for path in self._files():
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                files.append((st.st_mtime_ns, st.st_size, path))
+            total = sum(size for _, size, _ in files)
+            removed = 0
+            for _, size, path in sorted(files):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+            self._size = total
+            return removed
+
+class HttpBackend:
+    """Client for an artifact server (ArtifactCache.py serve): POST /lookup and POST /store in batches."""
+
+    def __init__(self, url, timeout=HTTP_TIMEOUT):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def _post(self, endpoint, body):
+        request = urllib.request.Request(self.url + endpoint, data=body, method="POST",
+                                         headers={"Content-Type": "application/octet-stream"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return response.read()
+
+    def get_many(self, keys):
+        found = {}
+        for i in range(0, len(keys), BATCH_SIZE):
+            chunk = keys[i:i + BATCH_SIZE]
+            found.update(unpack_frames(self._post("/lookup", b"".join(bytes.fromhex(k) for k in chunk))))
+        return found
+
+    def put_many(self, items):
+        self._post("/store", pack_frames(items))
+
+class ArtifactCache:
+    """Batched, fault-tolerant front end over a DirectoryBackend or HttpBackend.
+
+    fetch() looks up many keys at once; store() buffers uploads and sends them in batches of
+    batch_size (flush() sends the rest). A backend failure never fails the build: the cache
+    disables itself for the rest of the run and the error is kept in .error.
+    """
+
+    def __init__(self, backend, batch_size=BATCH_SIZE):
+        self.backend = backend
+        self.batch_size = batch_size
+        self.tag = interpreter_tag()
+        self.hits = 0
+        self.misses = 0
+        self.uploaded = 0
+        self.error = None
+        self._pending = {}
+
+    def key(self, source_sha256, optimize=None):
+        return artifact_key(source_sha256, self.tag, sys.flags.optimize if optimize is None else optimize)
+
+    def _disable(self, e):
+        self.error = f"{type(e).__name__}: {e}"
+        self._pending.clear()
+
+    def fetch(self, keys):
+        """Returns {key: artifact} for the keys the cache has."""
+        keys = sorted(set(keys))
+        found = {}
+        if keys and self.error is None:
+            try:
+                found = self.backend.get_many(keys)
+            except (OSError, ValueError, http.client.HTTPException) as e:
+                self._disable(e)
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def store(self, key, value):
+        if self.error is not None:
+            return
+        self._pending[key] = value
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._pending or self.error is not None:
+            return
+        items, self._pending = self._pending, {}
+        try:
+            self.backend.put_many(items)
+            self.uploaded += len(items)
+        except (OSError, ValueError, http.client.HTTPException) as e:
+            self._disable(e)
+
+    def summary(self):
+        return f"{self.hits} hit, {self.misses} miss, {self.uploaded} diunggah"
+
+def open_artifact_cache(location, max_bytes=DEFAULT_MAX_BYTES):
+    """http(s)://host:port -> HttpBackend, anything else is a cache folder."""
+    if location.startswith(("http://", "https://")):
+        return ArtifactCache(HttpBackend(location))
+    return ArtifactCache(DirectoryBackend(location, max_bytes))
+
+class ArtifactHandler(BaseHTTPRequestHandler):
+    """Stand-in artifact server over a DirectoryBackend (self.server.backend)."""
+
+    def _body(self):
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def _reply(self, status, body=b"", content_type="application/octet-stream"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        backend = self.server.backend
+        try:
+            if self.path == "/lookup":
+                body = self._body()
+                keys = [body[i:i + 32].hex() for i in range(0, len(body) - len(body) % 32, 32)]
+                self._reply(200, pack_frames(backend.get_many(keys)))
+            elif self.path == "/store":
+                backend.put_many(unpack_frames(self._body()))
+                self._reply(204)
+            else:
+                self._reply(404)
+        except (OSError, ValueError) as e:
+            self._reply(500, str(e).encode("utf-8"), "text/plain; charset=utf-8")
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._reply(200, json.dumps(self.server.backend.stats()).encode("utf-8"), "application/json")
+        else:
+            self._reply(404)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+def make_server(root, host="127.0.0.1", port=8765, max_bytes=DEFAULT_MAX_BYTES, verbose=False):
+    """Returns a ThreadingHTTPServer serving the artifact folder root (port 0 picks a free port)."""
+    server = ThreadingHTTPServer((host, port), ArtifactHandler)
+    server.backend = DirectoryBackend(root, max_bytes)
+    server.verbose = verbose
+    return server
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Shared artifact cache for compiled glyph bytecode.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="serve a cache folder over HTTP for build agents")
+    serve.add_argument("root")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--max-size", default="1G", help="LRU size bound, e.g. 512M (default: 1G)")
+    serve.add_argument("-v", "--verbose", action="store_true", help="log every request")
+    for name, help_text in (("stats", "show artifact count and size"), ("trim", "evict down to --max-size")):
+        command = sub.add_parser(name, help=help_text)
+        command.add_argument("root")
+        command.add_argument("--max-size", default="1G")
+    args = parser.parse_args(argv)
+
+    try:
+        max_bytes = parse_size(args.max_size)
+    except ValueError as e:
+        print(f"⛔ {e}")
+        return 2
+    if args.command == "serve":
+        server = make_server(args.root, args.host, args.port, max_bytes, args.verbose)
+        print(f"🗄️ Artifact cache {args.root} di http://{args.host}:{server.server_address[1]} — Ctrl+C untuk berhenti")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.server_close()
+        return 0
+    backend = DirectoryBackend(args.root, max_bytes)
+    if args.command == "trim":
+        print(f"🧹 {backend.trim()} artefak dihapus")
+    stats = backend.stats()
+    print(f"🗄️ {stats['artifacts']} artefak, {stats['bytes'] / 1024 / 1024:.1f} MB dari {max_bytes / 1024 / 1024:.0f} MB")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
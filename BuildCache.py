@@ -0,0 +1,141 @@
+import os, json, hashlib, importlib.util, sys
+
+CACHE_NAME = ".shrine_cache.json"
+CACHE_VERSION = 1
+SKIP_DIRS = {"__pycache__", ".glyphs"}
+
+def file_hash(filepath, chunk_size=1 << 20):
+    """Returns the SHA-256 of a file, read in chunks."""
+    hasher = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+def iter_sources(folder):
+    """Yields every .py file under folder, skipping bytecode and glyph folders."""
+    for root, dirs, files in os.walk(folder):
+        dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS)
+        for file in sorted(files):
+            if file.endswith(".py"):
+                yield os.path.join(root, file)
+
+class BuildCache:
+    """Persistent per-shrine cache: source path -> content hash, magic, optimize level, glyph name."""
+
+    def __init__(self, path, optimize=None, naming="", magic=None):
+        self.path = path
+        self.naming = naming # sidik jari skema penamaan glyph; berubah = semua entry invalid
+        self.magic = magic or importlib.util.MAGIC_NUMBER.hex() # build matrix: magic interpreter target
+        self.optimize = sys.flags.optimize if optimize is None or optimize < 0 else optimize
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+        self.removed = 0
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == CACHE_VERSION:
+                self.entries = data.get("entries", {})
+        except (OSError, ValueError):
+            # Cache rusak dianggap kosong, build berikutnya akan menulis ulang
+            self.entries = {}
+
+    def save(self):
+        """Writes the cache atomically (temp file + rename)."""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "entries": self.entries}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def lookup(self, key, source_path, glyph_folder):
+        """Returns (glyph_name, digest) on a hit, or (None, digest) when the module must be rebuilt.
+
+        A matching size and mtime lets the entry be reused without re-hashing the source.
+        Unknown modules return (None, None) so the compile worker can hash them instead.
+        """
+        st = os.stat(source_path)
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None, None
+
+        if entry.get("size") == st.st_size and entry.get("mtime_ns") == st.st_mtime_ns:
+            digest = entry.get("sha256")
+        else:
+            digest = file_hash(source_path)
+
+        if (entry.get("sha256") == digest
+                and entry.get("magic") == self.magic
+                and entry.get("optimize") == self.optimize
+                and entry.get("naming", "") == self.naming
+                and os.path.exists(os.path.join(glyph_folder, entry.get("glyph", "")))):
+            if entry.get("mtime_ns") != st.st_mtime_ns:
+                # Isi sama, hanya mtime berubah: perbarui agar lookup berikutnya tidak hash ulang
+                entry["size"], entry["mtime_ns"] = st.st_size, st.st_mtime_ns
+            self.hits += 1
+            return entry["glyph"], digest
+
+        self.invalidated += 1
+        return None, digest
+
+    def glyph_name(self, key):
+        """Returns the glyph name previously assigned to key under the current naming scheme, if any."""
+        entry = self.entries.get(key)
+        if entry and entry.get("naming", "") == self.naming:
+            return entry.get("glyph")
+        return None
+
+    def glyph_hash(self, key):
+        """Returns the SHA-256 recorded for key's glyph, if any."""
+        entry = self.entries.get(key)
+        return entry.get("glyph_sha256") if entry else None
+
+    def record(self, key, source_stat, digest, glyph_name, glyph_sha256):
+        """Stores key's entry; source_stat is [size, mtime_ns] captured when the compiled bytes were read.
+
+        Stat-ing the source again here could pair a newer mtime with the old digest, and the
+        size+mtime shortcut in lookup() would then keep the stale glyph forever.
+        """
+        size, mtime_ns = source_stat
+        self.entries[key] = {
+            "sha256": digest,
+            "size": size,
+            "mtime_ns": mtime_ns,
+            "magic": self.magic,
+            "optimize": self.optimize,
+            "glyph": glyph_name,
+            "glyph_sha256": glyph_sha256,
+            "naming": self.naming,
+        }
+
+    def prune(self, live_keys):
+        """Drops entries whose source no longer exists; returns {key: glyph_name} for them."""
+        live_keys = set(live_keys)
+        stale = {k: self.entries[k].get("glyph") for k in self.entries if k not in live_keys}
+        for k in stale:
+            del self.entries[k]
+        self.removed += len(stale)
+        return stale
+
+    def remove(self, keys):
+        """Drops the given keys, or every entry below them when a key is a removed directory.
+
+        Returns {key: glyph_name} for the dropped entries.
+        """
+        stale = {}
+        for prefix in keys:
+            for k in list(self.entries):
+                if k == prefix or k.startswith(prefix + os.sep):
+                    stale[k] = self.entries.pop(k).get("glyph")
+        self.removed += len(stale)
+        return stale
+
+    def summary(self):
+        return f"{self.hits} hit, {self.misses} miss, {self.invalidated} invalidated, {self.removed} removed"
@@ -0,0 +1,344 @@
+import os, sys, json, time, queue, threading, functools, subprocess, importlib.util
+
+from BuildCache import BuildCache, iter_sources
+from GlyphManifest import GlyphManifest
+from GlyphNames import GlyphNameIndex, naming_fingerprint
+from MatrixWorker import compile_once
+from ParallelCompiler import ParallelCompiler, POLL_INTERVAL, resolve_jobs
+from ShrineCore import (naming_key, glyph_folder_for, claim_names, load_cache, record_glyph, store_glyph,
+                        drop_stale)
+from ShrineJournal import BuildJournal, journal_path_for
+from ShrineMetrics import Metrics
+
+# Build matrix: beberapa interpreter x beberapa level optimize dalam satu pass. Tiap source
+# dibaca sekali per interpreter; tiap kombinasi punya folder glyph, cache & section manifest sendiri.
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "MatrixWorker.py")
+PROBE = "import sys, importlib.util; print(sys.implementation.cache_tag, importlib.util.MAGIC_NUMBER.hex())"
+
+class Target:
+    """One cell of the matrix: an interpreter plus an optimization level."""
+
+    def __init__(self, interpreter, cache_tag, magic, optimize, local):
+        self.interpreter = interpreter
+        self.cache_tag = cache_tag
+        self.magic = magic
+        self.optimize = optimize
+        self.local = local # magic sama dengan interpreter ini: compile di pool lokal
+        # Sama dengan penamaan __pycache__: cpython-311, cpython-311.opt-1, ...
+        self.tag = cache_tag + (f".opt-{optimize}" if optimize else "")
+
+    @property
+    def cache_name(self):
+        return f".shrine_cache.{self.tag}.json"
+
+def probe_interpreter(interpreter):
+    """Returns (cache_tag, magic hex) of another Python interpreter."""
+    out = subprocess.run([interpreter, "-c", PROBE], capture_output=True, text=True, check=True, timeout=30)
+    cache_tag, magic = out.stdout.split()
+    return cache_tag, magic
+
+def resolve_targets(interpreters=None, levels=None):
+    """Expands interpreter paths x optimization levels into Targets, dropping duplicate tags.
+
+    An empty interpreter list means the running interpreter. Interpreters whose magic number
+    matches the running one produce identical bytecode and are compiled in-process.
+    """
+    local_magic = importlib.util.MAGIC_NUMBER.hex()
+    targets, seen = [], set()
+    for interpreter in interpreters or [sys.executable]:
+        if interpreter == sys.executable:
+            cache_tag, magic = sys.implementation.cache_tag, local_magic
+        else:
+            cache_tag, magic = probe_interpreter(interpreter)
+        for level in sorted(set(levels or [0])):
+            if level not in (0, 1, 2):
+                raise ValueError(f"Level optimize tidak valid: {level} (0, 1 atau 2)")
+            target = Target(interpreter, cache_tag, magic, level, magic == local_magic)
+            if target.tag not in seen:
+                seen.add(target.tag)
+                targets.append(target)
+    return targets
+
+def _task_result(task):
+    return {"folder": task["folder"], "key": task["key"], "group": task["group"],
+            "levels": sorted(task["outputs"]), "digest": None, "outputs": {}, "error": None, "timings": {},
+            "source_stat": None}
+
+def compile_matrix_task(task):
+    """Pool task: one source, every local optimization level."""
+    result = _task_result(task)
+    try:
+        result.update(compile_once(task["source"], task["outputs"]))
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+class InterpreterWorkers:
+    """Persistent MatrixWorker subprocesses of one interpreter, fed JSON lines over stdin/stdout."""
+
+    def __init__(self, interpreter, count=1):
+        self.interpreter = interpreter
+        self.count = max(1, count)
+        self._procs = []
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+        for proc in list(self._procs):
+            proc.kill()
+
+    def run(self, tasks, on_result):
+        """Sends every task to the workers; on_result must be thread-safe (called from reader threads)."""
+        pending = queue.Queue()
+        for task in tasks:
+            pending.put(task)
+        threads = [threading.Thread(target=self._serve, args=(pending, on_result), daemon=True)
+                   for _ in range(min(self.count, len(tasks)))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def _serve(self, pending, on_result):
+        start_error = None
+        try:
+            proc = subprocess.Popen([self.interpreter, "-u", WORKER_SCRIPT], stdin=subprocess.PIPE,
+                                    stdout=subprocess.PIPE, text=True, encoding="utf-8")
+            self._procs.append(proc)
+        except OSError as e:
+            proc, start_error = None, f"Interpreter {self.interpreter} gagal dijalankan: {e}"
+        try:
+            while not self._cancelled:
+                try:
+                    task = pending.get_nowait()
+                except queue.Empty:
+                    break
+                result = _task_result(task)
+                result["error"] = start_error
+                if proc is not None:
+                    try:
+                        proc.stdin.write(json.dumps({"source": task["source"], "outputs": task["outputs"]}) + "\n")
+                        proc.stdin.flush()
+                        line = proc.stdout.readline()
+                        if not line:
+                            raise OSError(f"worker {self.interpreter} berhenti")
+                        result.update(json.loads(line))
+                    except (OSError, ValueError) as e:
+                        result["error"] = str(e)
+                on_result(result)
+        finally:
+            if proc is not None:
+                try:
+                    proc.stdin.close()
+                except OSError:
+                    pass
+                proc.wait()
+
+class MatrixBuild:
+    """Compiles every shrine for a list of Targets in one pass.
+
+    Sources are scanned once; for each interpreter a module is read once and compiled at
+    every optimization level it still needs. Glyphs of a target go to .glyphs-<tag> with
+    their own build cache and manifest section (target=<tag>), and all targets share the
+    module's glyph name so the sets line up file for file. Callbacks and metrics behave as in
+    ShrineBuild; per-file timings are summed over the levels of one interpreter.
+    """
+
+    def __init__(self, folders, manifest_path, targets, jobs=0, output_dir=None, log=print, detail=None,
+                 progress=None, glyph_salt="", metrics=None):
+        self.folders = folders
+        self.manifest_path = manifest_path
+        self.targets = targets
+        self.output_dir = output_dir
+        self.glyph_salt = glyph_salt
+        self.names = {} # glyph root -> GlyphNameIndex, dipakai bersama semua target
+        self.log = log
+        self.detail = detail or log
+        self.progress = progress or (lambda done, total, nbytes: None)
+        self.jobs = resolve_jobs(jobs)
+        self.engine = ParallelCompiler(jobs=jobs)
+        self.remote = {}
+        self.bundle_path = None # build matrix tidak membuat bundle; atribut sama dengan ShrineBuild
+        self.metrics = metrics or Metrics()
+        self.errors = 0
+        self.cancelled = False
+
+    def cancel(self):
+        """Safe to call from another thread; pool workers and interpreter subprocesses are stopped."""
+        self.cancelled = True
+        self.engine.cancel()
+        for workers in list(self.remote.values()):
+            workers.cancel()
+
+    def _group(self, target):
+        # Satu grup per interpreter (semua target lokal jadi satu grup): unit "baca sekali"
+        return "" if target.local else target.interpreter
+
+    def run(self):
+        """Builds every target and returns the list of glyph folders that received glyphs."""
+        self.metrics.start()
+        try:
+            return self._run()
+        finally:
+            self.metrics.stop()
+
+    def _run(self):
+        metrics = self.metrics
+        started = time.perf_counter()
+        by_level = {(self._group(t), str(t.optimize)): t for t in self.targets}
+        fingerprint = naming_fingerprint(self.glyph_salt)
+        with GlyphManifest(self.manifest_path) as manifest:
+            run_id = manifest.begin_run()
+            record = functools.partial(record_glyph, manifest, run_id)
+
+            shrines = {}
+            tasks = {}
+            stats = {"done": 0, "total": 0, "bytes": 0}
+            for folder in self.folders:
+                if self.cancelled:
+                    break
+                self.log(f"📦 Shrine: {folder}")
+                glyph_root = glyph_folder_for(folder, self.output_dir)
+                names = self.names.setdefault(glyph_root, GlyphNameIndex(self.glyph_salt))
+                if not claim_names(names, folder, self.output_dir, glyph_root, self.log):
+                    self.errors += 1
+                    continue
+                caches, journals = {}, {}
+                for target in self.targets:
+                    cloak_folder = glyph_folder_for(folder, self.output_dir, target.tag)
+                    os.makedirs(cloak_folder, exist_ok=True)
+                    cache = BuildCache(os.path.join(folder, target.cache_name), optimize=target.optimize,
+                                       naming=fingerprint, magic=target.magic)
+                    load_cache(cache, cloak_folder, names, folder, self.output_dir, self.log, f" [{target.tag}]")
+                    caches[target.tag] = (cache, cloak_folder)
+                    journals[target.tag] = BuildJournal(journal_path_for(cache.path))
+
+                try:
+                    sources = list(iter_sources(folder))
+                except Exception as e:
+                    self.errors += 1
+                    self.log(f"❌ Error compiling {folder}: {e}")
+                    continue
+                shrine = {"caches": caches, "journals": journals, "names": names, "keys": [], "found": set()}
+                shrines[folder] = shrine
+
+                for source_path in sources:
+                    key = os.path.relpath(source_path, folder)
+                    shrine["keys"].append(key)
+                    wanted = {}
+                    for target in self.targets:
+                        cache, cloak_folder = caches[target.tag]
+                        stats["total"] += 1
+                        try:
+                            glyph_name, _ = cache.lookup(key, source_path, cloak_folder)
+                        except OSError as e:
+                            self.errors += 1
+                            self.log(f"❌ Error: {source_path}: {e}")
+                            continue
+                        if glyph_name is not None:
+                            record(folder, key, os.path.join(cloak_folder, glyph_name), cache.glyph_hash(key),
+                                   target=target.tag)
+                            shrine["found"].add(target.tag)
+                            stats["done"] += 1
+                            metrics.count("files_cached")
+                            continue
+                        glyph_path = os.path.join(cloak_folder, names.name_for(naming_key(folder, key, self.output_dir)))
+                        wanted.setdefault(self._group(target), {})[str(target.optimize)] = glyph_path
+                    for group, outputs in wanted.items():
+                        tasks.setdefault(group, []).append({"folder": folder, "key": key, "source": source_path,
+                                                            "group": group, "outputs": outputs})
+
+            pending = sum(len(group_tasks) for group_tasks in tasks.values())
+            metrics.count("files_total", stats["total"])
+            metrics.add_stage("scan", time.perf_counter() - started)
+            t0 = time.perf_counter()
+            self.log(f"⚙️ Compiling {pending} module job(s) for {len(self.targets)} target(s): "
+                     f"{', '.join(t.tag for t in self.targets)}")
+            self.progress(stats["done"], stats["total"], stats["bytes"])
+
+            # Pool lokal dan worker interpreter lain berjalan bersamaan; semua hasil lewat satu
+            # antrian agar manifest (SQLite) hanya disentuh thread ini
+            results = queue.Queue()
+            share = max(1, self.jobs // max(1, len(tasks)))
+            runners = []
+            for group, group_tasks in sorted(tasks.items()):
+                if self.cancelled:
+                    break
+                if group:
+                    workers = self.remote[group] = InterpreterWorkers(group, share)
+                    runner = threading.Thread(target=workers.run, args=(group_tasks, results.put), daemon=True)
+                else:
+                    self.engine.jobs = share # pool lokal berbagi core dengan interpreter lain
+                    runner = threading.Thread(target=self.engine.run, args=(group_tasks, results.put),
+                                              kwargs={"task_func": compile_matrix_task}, daemon=True)
+                runners.append(runner)
+                runner.start()
+
+            received = 0
+            while received < pending and not self.cancelled:
+                try:
+                    result = results.get(timeout=POLL_INTERVAL)
+                except queue.Empty:
+                    if not any(runner.is_alive() for runner in runners) and results.empty():
+                        break
+                    continue
+                received += 1
+                self._on_result(result, shrines[result["folder"]], by_level, record, stats)
+
+            completed = received == pending and not self.cancelled
+            if not completed:
+                self.cancel()
+                self.cancelled = True
+                self.log("Kompilasi dibatalkan.")
+            for runner in runners:
+                runner.join()
+            metrics.add_stage("compile", time.perf_counter() - t0)
+            t0 = time.perf_counter()
+
+            outputs = []
+            for folder, shrine in shrines.items():
+                for target in self.targets:
+                    cache, cloak_folder = shrine["caches"][target.tag]
+                    if completed:
+                        drop_stale(cache.prune(shrine["keys"]), folder, cloak_folder, shrine["names"], manifest,
+                                   self.output_dir, target.tag)
+                    cache.save()
+                    shrine["journals"][target.tag].close(remove=True)
+                    self.log(f"♻️ Cache {folder} [{target.tag}]: {cache.summary()}")
+                    if target.tag in shrine["found"] and cloak_folder not in outputs:
+                        outputs.append(cloak_folder)
+                if not shrine["found"]:
+                    self.log(f"⚠️ No .py files found in {folder} for glyphification.")
+
+            manifest.finish_run(run_id)
+            metrics.add_stage("finalize", time.perf_counter() - t0)
+
+        metrics.add_stage("total", time.perf_counter() - started)
+        if not self.cancelled:
+            self.log("🧘‍♂️ Ritual selesai. Semua glyph disimpan.")
+        return outputs
+
+    def _on_result(self, result, shrine, by_level, record, stats):
+        folder, key = result["folder"], result["key"]
+        stats["done"] += len(result["levels"])
+        stats["bytes"] += sum(size for _, size in result["outputs"].values())
+        self.progress(stats["done"], stats["total"], stats["bytes"])
+        self.metrics.add_file(os.path.join(folder, key), result.get("timings") or {})
+        if result["error"]:
+            self.errors += 1
+            self.metrics.count("files_failed", len(result["levels"]))
+            tags = ", ".join(by_level[(result["group"], level)].tag for level in result["levels"])
+            self.log(f"❌ Error compiling {os.path.join(folder, key)} [{tags}]: {result['error']}")
+            return
+        for level, (glyph_sha256, size) in sorted(result["outputs"].items()):
+            target = by_level[(result["group"], level)]
+            cache, cloak_folder = shrine["caches"][target.tag]
+            glyph_name = shrine["names"].by_module[naming_key(folder, key, self.output_dir)]
+            store_glyph(cache, shrine["journals"][target.tag], cloak_folder, key, result["source_stat"],
+                        result["digest"], glyph_name, glyph_sha256)
+            record(folder, key, os.path.join(cloak_folder, glyph_name), glyph_sha256, target=target.tag)
+            shrine["found"].add(target.tag)
+            self.metrics.count("files_compiled")
+            self.metrics.count("bytes_written", size)
+            self.detail(f"✅ Glyphified [{target.tag}]: {glyph_name}")
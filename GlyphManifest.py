@@ -0,0 +1,238 @@
+import os, sys, sqlite3, argparse
+from datetime import datetime
+
+MANIFEST_PATH = "manifest_glyph.db"
+SCHEMA_VERSION = 4
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started TEXT NOT NULL,
+    finished TEXT
+);
+CREATE TABLE IF NOT EXISTS glyphs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    shrine TEXT NOT NULL,
+    source TEXT NOT NULL,
+    module TEXT NOT NULL,
+    glyph TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    sha256 TEXT NOT NULL,
+    superseded INTEGER NOT NULL DEFAULT 0,
+    target TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS verified (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    verified_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS import_sources (
+    source TEXT PRIMARY KEY,
+    shrine TEXT NOT NULL,
+    module TEXT NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS imports (
+    source TEXT NOT NULL REFERENCES import_sources(source),
+    imported TEXT NOT NULL,
+    PRIMARY KEY (source, imported)
+);
+CREATE INDEX IF NOT EXISTS import_sources_shrine ON import_sources(shrine);
+"""
+
+# Index dibuat setelah migrasi kolom, karena glyphs_source butuh kolom target
+INDEXES = """
+DROP INDEX IF EXISTS glyphs_source;
+CREATE INDEX IF NOT EXISTS glyphs_source_target ON glyphs(source, target, superseded);
+CREATE INDEX IF NOT EXISTS glyphs_glyph ON glyphs(glyph);
+CREATE INDEX IF NOT EXISTS glyphs_current ON glyphs(superseded, path);
+"""
+
+GLYPH_COLUMNS = ("run_id", "shrine", "source", "module", "glyph", "path", "size", "mtime", "sha256", "target")
+
+class GlyphManifest:
+    """Indexed SQLite manifest: one row per emitted glyph, older rows for a source marked superseded.
+
+    target names the manifest section a glyph belongs to: "" for a normal build, or a build
+    matrix tag such as "cpython-311.opt-1". Each (source, target) pair has its own live row.
+    """
+
+    def __init__(self, path=MANIFEST_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+        columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(glyphs)")}
+        if "target" not in columns:
+            # Manifest schema 2: semua glyph lama masuk section default ""
+            self.conn.execute("ALTER TABLE glyphs ADD COLUMN target TEXT NOT NULL DEFAULT ''")
+        self.conn.executescript(INDEXES)
+        self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    def begin_run(self):
+        cur = self.conn.execute("INSERT INTO runs (started) VALUES (?)", (datetime.now().isoformat(),))
+        self.conn.commit()
+        return cur.lastrowid
+
+    def finish_run(self, run_id):
+        self.conn.execute("UPDATE runs SET finished = ? WHERE id = ?", (datetime.now().isoformat(), run_id))
+        self.conn.commit()
+
+    def add_glyph(self, run_id, shrine, source, module, glyph, path, sha256, size=None, mtime=None, target=""):
+        """Records a glyph for this run and supersedes older rows for the same source and target.
+
+        An unchanged glyph (same name, path and SHA-256 as the live row) is not written again,
+        so runs that change nothing do not grow the manifest. Returns True if a row was added.
+        """
+        live = self.conn.execute(
+            "SELECT glyph, path, sha256 FROM glyphs WHERE source = ? AND target = ? AND superseded = 0",
+            (source, target)).fetchone()
+        if live is not None and tuple(live) == (glyph, path, sha256):
+            return False
+        if size is None or mtime is None:
+            st = os.stat(path)
+            size, mtime = st.st_size, st.st_mtime
+        self.conn.execute("UPDATE glyphs SET superseded = 1 WHERE source = ? AND target = ? AND superseded = 0",
+                          (source, target))
+        self.conn.execute(
+            f"INSERT INTO glyphs ({', '.join(GLYPH_COLUMNS)}) VALUES ({', '.join('?' * len(GLYPH_COLUMNS))})",
+            (run_id, shrine, source, module, glyph, path, size, mtime, sha256, target))
+        return True
+
+    def remove_source(self, source, target=None):
+        """Marks a deleted source's glyphs as superseded, in one target or (None) in every target."""
+        if not target:
+            self.conn.execute("DELETE FROM imports WHERE source = ?", (source,))
+            self.conn.execute("DELETE FROM import_sources WHERE source = ?", (source,))
+        if target is None:
+            self.conn.execute("UPDATE glyphs SET superseded = 1 WHERE source = ? AND superseded = 0", (source,))
+        else:
+            self.conn.execute("UPDATE glyphs SET superseded = 1 WHERE source = ? AND target = ? AND superseded = 0",
+                              (source, target))
+
+    def commit(self):
+        self.conn.commit()
+
+    def current_glyphs(self, target=None):
+        """Returns the live glyph rows (latest entry per source), optionally for one target only."""
+        if target is None:
+            return self.conn.execute("SELECT * FROM glyphs WHERE superseded = 0 ORDER BY path").fetchall()
+        return self.conn.execute(
+            "SELECT * FROM glyphs WHERE superseded = 0 AND target = ? ORDER BY path", (target,)).fetchall()
+
+    def targets(self):
+        """Returns {target: live glyph count} for every manifest section."""
+        return {row["target"]: row["live"] for row in self.conn.execute(
+            "SELECT target, COUNT(*) AS live FROM glyphs WHERE superseded = 0 GROUP BY target ORDER BY target")}
+
+    def find_by_source(self, source, target=""):
+        return self.conn.execute(
+            "SELECT * FROM glyphs WHERE source = ? AND target = ? AND superseded = 0", (source, target)).fetchone()
+
+    def find_by_glyph(self, glyph):
+        return self.conn.execute(
+            "SELECT * FROM glyphs WHERE glyph = ? ORDER BY superseded, run_id DESC", (glyph,)).fetchone()
+
+    def set_imports(self, shrine, source, module, sha256, imported):
+        """Replaces the import edges of one source (imported: absolute candidate module names)."""
+        self.conn.execute("DELETE FROM imports WHERE source = ?", (source,))
+        self.conn.execute("INSERT OR REPLACE INTO import_sources (source, shrine, module, sha256) VALUES (?, ?, ?, ?)",
+                          (source, shrine, module, sha256))
+        self.conn.executemany("INSERT OR IGNORE INTO imports (source, imported) VALUES (?, ?)",
+                              [(source, name) for name in imported])
+
+    def import_hashes(self, shrine):
+        """Returns {source: sha256} of the sources whose imports are indexed for a shrine."""
+        return {row["source"]: row["sha256"] for row in self.conn.execute(
+            "SELECT source, sha256 FROM import_sources WHERE shrine = ?", (shrine,))}
+
+    def import_rows(self, shrine):
+        """Returns (source, module, imported) rows of a shrine; imported is None for modules without imports."""
+        return [tuple(row) for row in self.conn.execute(
+            "SELECT s.source, s.module, i.imported FROM import_sources s "
+            "LEFT JOIN imports i ON i.source = s.source WHERE s.shrine = ?", (shrine,))]
+
+    def verified_state(self):
+        """Returns {path: (size, mtime_ns, sha256)} from the last successful validation of each glyph."""
+        return {row["path"]: (row["size"], row["mtime_ns"], row["sha256"])
+                for row in self.conn.execute("SELECT path, size, mtime_ns, sha256 FROM verified")}
+
+    def record_verified(self, entries):
+        """Stores (path, size, mtime_ns, sha256) tuples that just passed validation."""
+        now = datetime.now().isoformat()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO verified (path, size, mtime_ns, sha256, verified_at) VALUES (?, ?, ?, ?, ?)",
+                [(*entry, now) for entry in entries])
+
+    def stats(self):
+        row = self.conn.execute(
+            "SELECT (SELECT COUNT(*) FROM runs) AS runs, COUNT(*) AS rows, "
+            "COALESCE(SUM(superseded = 0), 0) AS live FROM glyphs").fetchone()
+        return dict(row)
+
+    def compact(self):
+        """Drops superseded rows and runs that no longer own a live glyph, then VACUUMs."""
+        with self.conn:
+            dropped_rows = self.conn.execute("DELETE FROM glyphs WHERE superseded = 1").rowcount
+            dropped_runs = self.conn.execute(
+                "DELETE FROM runs WHERE id NOT IN (SELECT DISTINCT run_id FROM glyphs)").rowcount
+            self.conn.execute("DELETE FROM verified WHERE path NOT IN (SELECT path FROM glyphs)")
+        self.conn.execute("VACUUM")
+        return dropped_rows, dropped_runs
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query or compact the glyph manifest.")
+    parser.add_argument("-m", "--manifest", default=MANIFEST_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("compact", help="drop superseded runs and glyph rows")
+    sub.add_parser("stats", help="show run and glyph counts")
+    find = sub.add_parser("find", help="look up a glyph by source path or glyph name")
+    find.add_argument("--source")
+    find.add_argument("--glyph")
+    find.add_argument("--target", default="", help="build matrix section (default: normal build)")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.manifest):
+        print("⛔ Manifest tidak ditemukan.")
+        return 1
+
+    with GlyphManifest(args.manifest) as manifest:
+        if args.command == "compact":
+            before = os.path.getsize(args.manifest)
+            rows, runs = manifest.compact()
+            print(f"🧹 Compacted: {rows} glyph row(s), {runs} run(s) dropped "
+                  f"({before} → {os.path.getsize(args.manifest)} bytes)")
+        elif args.command == "stats":
+            s = manifest.stats()
+            print(f"📜 {s['runs']} run(s), {s['live']} live glyph(s), {s['rows']} row(s) total")
+            for target, live in manifest.targets().items():
+                if target:
+                    print(f"   🎯 {target}: {live} live glyph(s)")
+        else:
+            row = manifest.find_by_glyph(args.glyph) if args.glyph else manifest.find_by_source(os.path.abspath(args.source or ""), args.target)
+            if row is None:
+                print("❌ Tidak ditemukan.")
+                return 1
+            for key in row.keys():
+                print(f"{key}: {row[key]}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+import os, json, hashlib
+
+ALPHABET = "abcdefghijklmnopqrstuvwxyz0123456789"
+# Config GUI; glyph_salt di dalamnya juga default CLI, agar kedua frontend memberi nama yang sama
+COMPILER_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "compiler_config.json")
+
+def derive_name(module_key, salt="", length=6, attempt=0):
+    """Keyed BLAKE2b of the module path, rendered as gy_<base36>.pyc. Same inputs, same name."""
+    data = module_key if not attempt else f"{module_key}#{attempt}"
+    digest = hashlib.blake2b(data.encode("utf-8"), key=salt.encode("utf-8")[:64], digest_size=16).digest()
+    value = int.from_bytes(digest, "big")
+    chars = []
+    for _ in range(length):
+        value, rem = divmod(value, len(ALPHABET))
+        chars.append(ALPHABET[rem])
+    return "gy_" + "".join(chars) + ".pyc"
+
+def config_salt(path=COMPILER_CONFIG_PATH):
+    """Returns the glyph_salt stored in compiler_config.json, or "" when there is none."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            salt = json.load(f).get("glyph_salt")
+    except (OSError, ValueError, AttributeError):
+        return ""
+    return salt if isinstance(salt, str) else ""
+
+def naming_fingerprint(salt="", length=6):
+    """Short id of the naming scheme; stored in the build cache so a new salt renames every glyph."""
+    return hashlib.blake2b(f"{length}:{salt}".encode("utf-8"), digest_size=8).hexdigest()
+
+class GlyphNameIndex:
+    """Stable glyph names with O(1) collision detection and glyph -> module reverse lookup.
+
+    A collision is resolved by re-deriving with an attempt counter (module#1, module#2, ...),
+    so the result only depends on which names were already taken, not on randomness.
+    """
+
+    def __init__(self, salt="", length=6):
+        self.salt = salt
+        self.length = length
+        self.by_glyph = {}
+        self.by_module = {}
+        self.shrines = {} # shrine id -> folder yang memakainya
+        self.collisions = 0
+
+    def claim_shrine(self, shrine_id, folder):
+        """Registers the shrine behind a naming-key prefix; returns False if another folder already uses it."""
+        folder = os.path.abspath(folder)
+        return self.shrines.setdefault(shrine_id, folder) == folder
+
+    def reserve(self, glyph, module_key):
+        """Registers an existing name (e.g. from the build cache); returns False if taken by another module."""
+        owner = self.by_glyph.get(glyph)
+        if owner is not None and owner != module_key:
+            return False
+        self.by_glyph[glyph] = module_key
+        self.by_module[module_key] = glyph
+        return True
+
+    def name_for(self, module_key):
+        glyph = self.by_module.get(module_key)
+        if glyph is not None:
+            return glyph
+        attempt = 0
+        while True:
+            glyph = derive_name(module_key, self.salt, self.length, attempt)
+            if glyph not in self.by_glyph:
+                break
+            attempt += 1
+            self.collisions += 1
+        self.reserve(glyph, module_key)
+        return glyph
+
+    def module_for(self, glyph):
+        """Reverse lookup: glyph file name -> module key, or None."""
+        return self.by_glyph.get(glyph)
+
+    def release(self, module_key):
+        glyph = self.by_module.pop(module_key, None)
+        if glyph is not None:
+            self.by_glyph.pop(glyph, None)
@@ -1,43 +1,104 @@
-import os, hashlib
+import os, sys, time, argparse
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from BuildCache import file_hash
+from GlyphManifest import GlyphManifest, MANIFEST_PATH
 
 GLYPH_FOLDER = "output/.glyphs"
-MANIFEST_PATH = "manifest_glyph.txt"
+CHUNK_SIZE = 1 << 20  # 1 MiB per read, memori tetap konstan berapapun ukuran glyph
 
-def hash_file(filepath):
-    hasher = hashlib.sha256()
+def hash_file(filepath, chunk_size=CHUNK_SIZE):
     try:
-        with open(filepath, "rb") as f:
-            buf = f.read()
-            hasher.update(buf)
-        return hasher.hexdigest()
+        # hashlib melepas GIL untuk buffer besar, jadi thread pool benar-benar paralel
+        return file_hash(filepath, chunk_size)
     except Exception as e:
         return f"ERROR: {e}"
 
-def validate_glyphs():
+def _check_glyph(row, verified):
+    """Returns (row, status, verified_entry, bytes_hashed) for one manifest row."""
+    path = row["path"]
+    try:
+        st = os.stat(path)
+    except OSError:
+        return row, "missing", None, 0
+
+    previous = verified.get(path)
+    if previous == (st.st_size, st.st_mtime_ns, row["sha256"]):
+        return row, "skipped", None, 0
+
+    h = hash_file(path)
+    if h != row["sha256"]:
+        return row, "mismatch", None, st.st_size
+    return row, "ok", (path, st.st_size, st.st_mtime_ns, h), st.st_size
+
+def validate_glyphs(manifest_path=MANIFEST_PATH, glyph_folder=GLYPH_FOLDER, jobs=None, full=False, verbose=False,
+                    sources=None):
+    """Validates every live glyph stored in glyph_folder against its manifest hash.
+
+    Rows of other glyph folders in the same manifest (other shrines, matrix targets) are
+    left out. sources optionally restricts validation to the glyphs of those source paths (e.g. the
+    modules affected by an edit, from ImportGraph.affected).
+
+    Glyphs whose size and mtime are unchanged since their last successful validation
+    are skipped unless full=True. Returns True when every glyph is present and matches.
+    """
     print(f"🔍 Memulai validasi shrine: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    if not os.path.exists(GLYPH_FOLDER):
+    if not os.path.exists(glyph_folder):
         print("⛔ Glyph folder tidak ditemukan.")
-        return
+        return False
 
-    if not os.path.exists(MANIFEST_PATH):
+    if not os.path.exists(manifest_path):
         print("⛔ Manifest tidak ditemukan.")
-        return
+        return False
+
+    with GlyphManifest(manifest_path) as manifest:
+        root = os.path.join(os.path.abspath(glyph_folder), "")
+        rows = [row for row in manifest.current_glyphs() if row["path"].startswith(root)]
+        if sources is not None:
+            wanted = {os.path.abspath(s) for s in sources}
+            rows = [row for row in rows if row["source"] in wanted]
+        verified = {} if full else manifest.verified_state()
+        print(f"📜 Jumlah glyph di manifest: {len(rows)}")
+
+        counts = {"ok": 0, "skipped": 0, "missing": 0, "mismatch": 0}
+        newly_verified = []
+        total_bytes = 0
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=jobs or min(32, (os.cpu_count() or 1) * 4)) as pool:
+            for row, status, entry, nbytes in pool.map(lambda r: _check_glyph(r, verified), rows):
+                counts[status] += 1
+                total_bytes += nbytes
+                if entry:
+                    newly_verified.append(entry)
+                if status == "missing":
+                    print(f"❌ Tidak ditemukan: {row['path']}")
+                elif status == "mismatch":
+                    print(f"⚠️ Hash berbeda: {row['glyph']} ({row['module']})")
+                elif verbose and status == "ok":
+                    print(f"✅ {row['glyph']} → {entry[3]}")
+        elapsed = time.perf_counter() - started
 
-    with open(MANIFEST_PATH, "r", encoding="utf-8") as manifest:
-        lines = [l.strip() for l in manifest.readlines() if l.strip().endswith(".pyc")]
-        print(f"📜 Jumlah glyph di manifest: {len(lines)}")
+        if newly_verified:
+            manifest.record_verified(newly_verified)
 
-        match = 0
-        for path in lines:
-            if os.path.exists(path):
-                h = hash_file(path)
-                print(f"✅ {os.path.basename(path)} → {h}")
-                match += 1
-            else:
-                print(f"❌ Tidak ditemukan: {path}")
+    match = counts["ok"] + counts["skipped"]
+    throughput = total_bytes / (1024 * 1024) / elapsed if elapsed > 0 else 0.0
+    print(f"\n🔐 Total tervalidasi: {match}/{len(rows)} glyph "
+          f"({counts['ok']} hashed, {counts['skipped']} unchanged, {counts['missing']} missing, "
+          f"{counts['mismatch']} mismatch) — {total_bytes / (1024 * 1024):.1f} MB in {elapsed:.2f}s, "
+          f"{throughput:.1f} MB/s")
+    return match == len(rows)
 
-        print(f"\n🔐 Total tervalidasi: {match}/{len(lines)} glyph")
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate glyphs against the manifest hashes.")
+    parser.add_argument("-m", "--manifest", default=MANIFEST_PATH)
+    parser.add_argument("-g", "--glyph-folder", default=GLYPH_FOLDER)
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="hashing threads")
+    parser.add_argument("--full", action="store_true", help="re-hash every glyph, ignoring previous validations")
+    parser.add_argument("-v", "--verbose", action="store_true", help="print one line per hashed glyph")
+    args = parser.parse_args(argv)
+    ok = validate_glyphs(args.manifest, args.glyph_folder, args.jobs, args.full, args.verbose)
+    return 0 if ok else 1
 
 if __name__ == "__main__":
-    validate_glyphs()
\ No newline at end of file
+    sys.exit(main())
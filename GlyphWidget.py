@@ -1,13 +1,29 @@
-from PyQt6.QtSvgWidgets import QSvgWidget
-from PyQt6.QtCore import QTimer
-from PyQt6.QtGui import QIcon
+from PyQt6.QtWidgets import QWidget
+from PyQt6.QtSvg import QSvgRenderer
+from PyQt6.QtCore import QTimer, QFileSystemWatcher
+from PyQt6.QtGui import QPainter
+from collections import OrderedDict
 import sys, os, random
 
-class GlyphWidget(QSvgWidget):
-    def __init__(self, glyph_folder="assets/glyphs", parent=None):
+class GlyphWidget(QWidget):
+    """Cycles random SVG glyphs from a folder.
+
+    The folder is listed once and re-listed only after QFileSystemWatcher reports a change;
+    parsed QSvgRenderers are kept in an LRU of cache_size entries, so at steady state a tick
+    only picks a cached renderer and repaints. Timers stop while the widget is hidden.
+    """
+
+    def __init__(self, glyph_folder="assets/glyphs", parent=None, cache_size=32):
         super().__init__(parent)
         self.setMinimumSize(120, 120)
-        self.timer = QTimer()
+        self.cache_size = cache_size
+        self.renderers = OrderedDict() # path -> QSvgRenderer, urutan = LRU
+        self.glyphs = []
+        self.broken = set() # SVG tidak valid: tidak dibaca ulang sampai folder berubah
+        self.current = None
+        self._dirty = True # daftar file perlu di-scan ulang
+        self._running = False
+        self.timer = QTimer(self)
         self.timer.timeout.connect(self.show_random_glyph)
 
         # 🔍 Resolve path for onefile or normal mode
@@ -20,19 +36,79 @@ class GlyphWidget(QSvgWidget):
         if not os.path.exists(self.glyph_folder):
             os.makedirs(self.glyph_folder)
 
+        # Perubahan folder hanya menandai dirty; scan dilakukan di tick berikutnya yang terlihat
+        self.watcher = QFileSystemWatcher([self.glyph_folder], self)
+        self.watcher.directoryChanged.connect(self._mark_dirty)
+
     def start_loop(self, interval_ms=800):
-        self.timer.start(interval_ms)
+        self._running = True
+        self.timer.setInterval(interval_ms)
+        if self.isVisible():
+            self.timer.start()
 
     def stop_loop(self):
+        self._running = False
         self.timer.stop()
 
-    def show_random_glyph(self):
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self._running:
+            self.timer.start()
+
+    def hideEvent(self, event):
+        # Tersembunyi: tidak ada tick, tidak ada akses disk
+        self.timer.stop()
+        super().hideEvent(event)
+
+    def _mark_dirty(self, path=None):
+        self._dirty = True
+
+    def _scan(self):
         try:
-            glyphs = [f for f in os.listdir(self.glyph_folder) if f.endswith(".svg")]
-            if glyphs:
-                choice = random.choice(glyphs)
-                self.load(os.path.join(self.glyph_folder, choice))
-            else:
-                print("⚠️ Tidak ada glyph SVG ditemukan di folder:", self.glyph_folder)
-        except Exception as e:
-            print(f"❌ Gagal load glyph: {e}")
\ No newline at end of file
+            names = sorted(f for f in os.listdir(self.glyph_folder) if f.endswith(".svg"))
+        except OSError as e:
+            print(f"❌ Gagal membaca folder glyph: {e}")
+            names = []
+        self.glyphs = [os.path.join(self.glyph_folder, f) for f in names]
+        live = set(self.glyphs)
+        self.broken.clear()
+        for path in [p for p in self.renderers if p not in live]:
+            del self.renderers[path]
+        # Pre-parse sampai batas LRU agar tick berikutnya tidak membaca disk
+        for path in self.glyphs[:self.cache_size]:
+            self._renderer(path)
+        self._dirty = False
+        if not self.glyphs:
+            print("⚠️ Tidak ada glyph SVG ditemukan di folder:", self.glyph_folder)
+
+    def _renderer(self, path):
+        renderer = self.renderers.get(path)
+        if renderer is not None:
+            self.renderers.move_to_end(path)
+            return renderer
+        if path in self.broken:
+            return None
+        renderer = QSvgRenderer(path) # tanpa parent: dilepas GC saat keluar dari LRU
+        if not renderer.isValid():
+            print(f"❌ Gagal load glyph: {path}")
+            self.broken.add(path)
+            return None
+        self.renderers[path] = renderer
+        while len(self.renderers) > self.cache_size:
+            self.renderers.popitem(last=False)
+        return renderer
+
+    def show_random_glyph(self):
+        if self._dirty:
+            self._scan()
+        if not self.glyphs:
+            return
+        self.current = self._renderer(random.choice(self.glyphs))
+        self.update()
+
+    def paintEvent(self, event):
+        if self.current is None:
+            return
+        painter = QPainter(self)
+        self.current.render(painter)
+        painter.end()
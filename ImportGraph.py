@@ -0,0 +1,169 @@
+import os, sys, dis, types, argparse
+
+from GlyphManifest import GlyphManifest, MANIFEST_PATH
+
+# Indeks import statis: diisi saat kompilasi dan disimpan di manifest, untuk menjawab
+# "modul mana yang terdampak kalau modul ini berubah".
+
+IMPORT_NAME = dis.opmap["IMPORT_NAME"]
+LOAD_CONST = dis.opmap["LOAD_CONST"]
+LOAD_SMALL_INT = dis.opmap.get("LOAD_SMALL_INT") # Python 3.14+
+
+def _instruction(raw, pos):
+    """Returns (opcode, full arg, start of the previous instruction) for the instruction at pos."""
+    arg, shift, prev = raw[pos + 1], 8, pos - 2
+    while prev >= 0 and raw[prev] == dis.EXTENDED_ARG:
+        arg |= raw[prev + 1] << shift
+        shift += 8
+        prev -= 2
+    return raw[pos], arg, prev
+
+def _constant(co, raw, pos):
+    if pos < 0:
+        return None, pos
+    op, arg, prev = _instruction(raw, pos)
+    if op == LOAD_CONST:
+        return co.co_consts[arg], prev
+    if op == LOAD_SMALL_INT:
+        return arg, prev
+    return None, prev
+
+def scan_imports(code):
+    """Returns [(name, level, fromlist)] for every import statement compiled into code.
+
+    Scans the raw bytecode of the module and all nested code objects for IMPORT_NAME
+    (preceded by the level and fromlist constants), so it reuses the compiler's own parse
+    and costs far less than a second AST pass. Also works on a glyph via marshal.loads.
+    """
+    found = []
+    stack = [code]
+    marker = bytes([IMPORT_NAME])
+    while stack:
+        co = stack.pop()
+        raw = co.co_code
+        pos = raw.find(marker)
+        while pos != -1:
+            if pos % 2 == 0: # offset genap = opcode, ganjil = argumen
+                _, name_index, prev = _instruction(raw, pos)
+                fromlist, prev = _constant(co, raw, prev)
+                level, _ = _constant(co, raw, prev)
+                found.append((co.co_names[name_index], level if isinstance(level, int) else 0,
+                              [name for name in fromlist or () if isinstance(name, str)]))
+            pos = raw.find(marker, pos + 1)
+        stack.extend(c for c in co.co_consts if isinstance(c, types.CodeType))
+    return found
+
+def resolve_imports(module, is_package, imports):
+    """Maps raw imports of `module` to the absolute module names they may refer to.
+
+    `from a import b` yields both a and a.b, since b may be a submodule; names that are
+    not modules of the shrine are filtered out at query time.
+    """
+    package = module if is_package else module.rpartition(".")[0]
+    names = set()
+    for name, level, fromlist in imports:
+        if level:
+            parts = package.split(".") if package else []
+            if level - 1 > len(parts):
+                continue # relative import di luar shrine
+            base = ".".join(parts[:len(parts) - (level - 1)])
+            name = ".".join(p for p in (base, name) if p)
+        if not name:
+            continue
+        # import a.b.c juga menjalankan a dan a.b
+        parts = name.split(".")
+        names.update(".".join(parts[:i]) for i in range(1, len(parts) + 1))
+        names.update(f"{name}.{item}" for item in fromlist if item != "*")
+    names.discard(module)
+    return sorted(names)
+
+class ImportGraph:
+    """Import-graph queries over the manifest's imports table, scoped to one shrine folder."""
+
+    def __init__(self, manifest, shrine):
+        self.shrine = os.path.abspath(shrine)
+        rows = manifest.import_rows(self.shrine)
+        self.sources = {}
+        self.forward = {}
+        for source, module, imported in rows:
+            self.sources[module] = source
+            if imported is not None:
+                self.forward.setdefault(module, set()).add(imported)
+        # Hanya nama yang benar-benar modul di shrine ini yang jadi edge
+        self.forward = {m: {i for i in names if i in self.sources} for m, names in self.forward.items()}
+        self.reverse = {}
+        for module, names in self.forward.items():
+            for imported in names:
+                self.reverse.setdefault(imported, set()).add(module)
+
+    @staticmethod
+    def _walk(graph, start, transitive):
+        seen = set()
+        stack = [start]
+        while stack:
+            for nxt in graph.get(stack.pop(), ()):
+                if nxt not in seen and nxt != start:
+                    seen.add(nxt)
+                    if transitive:
+                        stack.append(nxt)
+        return seen
+
+    def dependents(self, module, transitive=True):
+        """Modules that import `module` (directly, or through other modules when transitive)."""
+        return self._walk(self.reverse, module, transitive)
+
+    def dependencies(self, module, transitive=True):
+        """Shrine modules that `module` imports."""
+        return self._walk(self.forward, module, transitive)
+
+    def module_for(self, source):
+        source = os.path.abspath(source)
+        for module, path in self.sources.items():
+            if path == source:
+                return module
+        return None
+
+    def affected(self, sources):
+        """Source paths of the given files plus every module that transitively imports them."""
+        result = {os.path.abspath(s) for s in sources}
+        for source in list(result):
+            module = self.module_for(source)
+            if module is not None:
+                result.update(self.sources[m] for m in self.dependents(module))
+        return sorted(result)
+
+def affected_changes(manifest_path, folders, paths):
+    """Expands changed files into {folder: affected source paths} for ShrineBuild.run(changed=...)."""
+    changed = {}
+    with GlyphManifest(manifest_path) as manifest:
+        for folder in folders:
+            root = os.path.abspath(folder)
+            mine = [p for p in paths if os.path.abspath(p).startswith(root + os.sep)]
+            if mine:
+                changed[folder] = ImportGraph(manifest, folder).affected(mine)
+    return changed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the import graph recorded during compilation.")
+    parser.add_argument("-m", "--manifest", default=MANIFEST_PATH)
+    parser.add_argument("command", choices=("dependents", "dependencies"))
+    parser.add_argument("module", help="dotted module name inside the shrine")
+    parser.add_argument("--shrine", required=True, help="shrine folder the module belongs to")
+    parser.add_argument("--direct", action="store_true", help="only direct edges, not the transitive closure")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.manifest):
+        print("⛔ Manifest tidak ditemukan.")
+        return 1
+    with GlyphManifest(args.manifest) as manifest:
+        graph = ImportGraph(manifest, args.shrine)
+    if args.module not in graph.sources:
+        print(f"❌ Modul tidak dikenal: {args.module}")
+        return 1
+    query = graph.dependents if args.command == "dependents" else graph.dependencies
+    for module in sorted(query(args.module, transitive=not args.direct)):
+        print(f"{module}\t{graph.sources[module]}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
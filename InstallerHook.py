@@ -1,8 +1,8 @@
 import subprocess, os
 from ShrineBundler import bundle_glyphs
+from GlyphManifest import MANIFEST_PATH
 
 GLYPH_FOLDER = "output/.glyphs"
-MANIFEST_PATH = "manifest_glyph.txt"
 INSTALLER_CMD = ["pyinstaller", "main.py", "--onefile", "--noconsole"]
 
 def run_hook():
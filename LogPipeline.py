@@ -0,0 +1,82 @@
+import threading
+from collections import deque
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from PyQt6.QtGui import QTextCursor
+
+# Worker menulis ke buffer (tanpa signal per file); UI thread mengosongkan buffer per tick timer
+
+class LogPipeline(QObject):
+    """Buffers worker log lines and progress, flushing them to a QTextEdit in batches.
+
+    push()/set_progress() are thread-safe and cheap, so the worker can call them for every
+    glyph. The view keeps at most max_lines lines; detail lines (one per glyph) are only shown
+    when show_details is on but are always kept in the ring buffer so toggling re-renders them.
+    """
+
+    progress = pyqtSignal(int, int, 'qint64') # done, total, bytes (64-bit: matrix builds pass 2 GiB quickly)
+
+    def __init__(self, view, max_lines=5000, interval_ms=100, parent=None):
+        super().__init__(parent)
+        self.view = view
+        self.view.document().setMaximumBlockCount(max_lines)
+        self.lines = deque(maxlen=max_lines) # ring buffer: (is_detail, message)
+        self.show_details = True
+        self._pending = []
+        self._pending_progress = None
+        self._lock = threading.Lock()
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.flush)
+
+    def start(self):
+        self.timer.start()
+
+    def stop(self):
+        self.timer.stop()
+        self.flush()
+
+    def push(self, message, detail=False):
+        with self._lock:
+            self._pending.append((detail, message))
+
+    def summary(self, message):
+        self.push(message, detail=False)
+
+    def detail(self, message):
+        self.push(message, detail=True)
+
+    def set_progress(self, done, total, nbytes):
+        # Hanya nilai terakhir yang dikirim ke UI per tick
+        with self._lock:
+            self._pending_progress = (done, total, nbytes)
+
+    def flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, []
+            progress, self._pending_progress = self._pending_progress, None
+
+        if batch:
+            self.lines.extend(batch)
+            visible = [m for d, m in batch if self.show_details or not d]
+            if visible:
+                # Satu insert per batch; insertText memecah "\n" jadi block sehingga
+                # maximumBlockCount bisa memangkas baris lama satu per satu
+                cursor = self.view.textCursor()
+                cursor.movePosition(QTextCursor.MoveOperation.End)
+                prefix = "\n" if not self.view.document().isEmpty() else ""
+                cursor.insertText(prefix + "\n".join(visible[-self.lines.maxlen:]))
+                bar = self.view.verticalScrollBar()
+                bar.setValue(bar.maximum())
+        if progress is not None:
+            self.progress.emit(*progress)
+
+    def set_show_details(self, enabled):
+        self.show_details = enabled
+        self.view.setPlainText("\n".join(m for d, m in self.lines if enabled or not d))
+
+    def clear(self):
+        with self._lock:
+            self._pending = []
+        self.lines.clear()
+        self.view.clear()
@@ -0,0 +1,64 @@
+import os, sys, json, time, marshal, hashlib, importlib.util
+
+# Worker build matrix. Dijalankan oleh interpreter target (python3.X MatrixWorker.py), jadi
+# hanya stdlib dan sintaks yang juga valid di versi Python lama.
+
+def pyc_header(source_stat):
+    """The 16-byte timestamp-based .pyc header (PEP 552) for a source with this stat."""
+    return (importlib.util.MAGIC_NUMBER + b"\0\0\0\0"
+            + (int(source_stat.st_mtime) & 0xFFFFFFFF).to_bytes(4, "little")
+            + (source_stat.st_size & 0xFFFFFFFF).to_bytes(4, "little"))
+
+def pyc_payload(code, source_stat):
+    """Timestamp-based .pyc bytes, the same bytes py_compile writes for code."""
+    return pyc_header(source_stat) + marshal.dumps(code)
+
+def compile_once(source_path, outputs):
+    """Reads source_path once and writes one .pyc per optimization level.
+
+    Each level compiles from the source bytes: handing one shared AST to compile() is
+    slower than re-parsing, because the Python AST must be converted back for every call.
+
+    outputs maps an optimization level (as a string, it travels through JSON) to the glyph
+    path. Returns {"digest": source sha256, "outputs": {level: [glyph sha256, size]},
+    "source_stat": [size, mtime_ns] of the bytes read, "timings": seconds spent per stage
+    (compile, write, hash) over all levels}.
+    """
+    with open(source_path, "rb") as f:
+        st = os.fstat(f.fileno())
+        data = f.read()
+    written = {}
+    timings = {"compile": 0.0, "write": 0.0, "hash": 0.0}
+    for level, glyph_path in sorted(outputs.items()):
+        t0 = time.perf_counter()
+        code = compile(data, source_path, "exec", dont_inherit=True, optimize=int(level))
+        payload = pyc_payload(code, st)
+        t1 = time.perf_counter()
+        tmp_path = glyph_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, glyph_path)
+        t2 = time.perf_counter()
+        written[level] = [hashlib.sha256(payload).hexdigest(), len(payload)]
+        timings["compile"] += t1 - t0
+        timings["write"] += t2 - t1
+        timings["hash"] += time.perf_counter() - t2
+    t0 = time.perf_counter()
+    digest = hashlib.sha256(data).hexdigest()
+    timings["hash"] += time.perf_counter() - t0
+    return {"digest": digest, "outputs": written, "source_stat": [st.st_size, st.st_mtime_ns], "timings": timings}
+
+def serve(stdin=sys.stdin, stdout=sys.stdout):
+    """JSON-lines loop: one {"source", "outputs"} request in, one reply out, until stdin closes."""
+    for line in stdin:
+        request = json.loads(line)
+        try:
+            reply = compile_once(request["source"], request["outputs"])
+            reply["error"] = None
+        except Exception as e:
+            reply = {"digest": None, "outputs": {}, "error": "%s: %s" % (type(e).__name__, e)}
+        stdout.write(json.dumps(reply) + "\n")
+        stdout.flush()
+
+if __name__ == "__main__":
+    serve()
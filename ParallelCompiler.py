@@ -0,0 +1,263 @@
+import os, time, shutil, hashlib, threading, py_compile, importlib.util, multiprocessing, functools
+from BuildCache import file_hash
+from ImportGraph import scan_imports
+from ArtifactCache import load_artifact, pack_artifact
+from MatrixWorker import pyc_header, pyc_payload
+from ShrinePak import make_entry
+
+POLL_INTERVAL = 0.1  # detik, seberapa sering cancel diperiksa saat menunggu hasil
+MAX_CHUNKSIZE = 64
+INLINE_TASKS = 4  # batch sekecil ini (mis. watch mode) lebih cepat tanpa spawn pool
+
+GLYPH_MODES = ("direct", "link", "copy")
+FICLONE = 0x40049409  # ioctl Linux untuk reflink (btrfs, xfs, ...)
+
+def fast_copy(src, dst):
+    """Copies src to dst via reflink or copy_file_range when the OS supports it, else shutil."""
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        try:
+            import fcntl
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            return
+        except (ImportError, OSError):
+            pass
+        if hasattr(os, "copy_file_range"):
+            try:
+                remaining = os.fstat(fsrc.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+                if remaining == 0:
+                    return
+                fsrc.seek(0)
+                fdst.seek(0)
+                fdst.truncate()
+            except OSError:
+                fsrc.seek(0)
+                fdst.seek(0)
+                fdst.truncate()
+        shutil.copyfileobj(fsrc, fdst)
+
+def place_glyph(pyc_path, glyph_path, mode):
+    """Puts the compiled bytecode at glyph_path: hardlink (link) or full copy (copy).
+
+    Either way the glyph appears atomically (temp file + rename), never half-written.
+    """
+    tmp_path = glyph_path + ".tmp"
+    if mode == "copy":
+        shutil.copy2(pyc_path, tmp_path)
+        os.replace(tmp_path, glyph_path)
+        return
+    try:
+        os.link(pyc_path, tmp_path)
+    except OSError:
+        # Beda filesystem atau FS tanpa hardlink: jatuh ke reflink/copy_file_range/copy
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        fast_copy(pyc_path, tmp_path)
+    os.replace(tmp_path, glyph_path)
+
+def compile_source(source_path, cfile, artifact=None, artifact_digest=None):
+    """Like py_compile.compile, but returns (source sha256, pyc bytes, imports, source stat).
+
+    Source and glyph are each touched once (no read-back for hashing), imports come from
+    the compiled code object, and the .pyc is written atomically (temp + rename). The stat
+    is taken from the handle the source was read through, so it describes those bytes.
+    artifact is a value from the shared ArtifactCache, looked up under artifact_digest; it
+    replaces the compile step unless the source changed since then, and a damaged one falls
+    back to compiling.
+    """
+    with open(source_path, "rb") as f:
+        st = os.fstat(f.fileno())
+        source = f.read()
+    digest = hashlib.sha256(source).hexdigest()
+    code = None
+    if artifact is not None and digest == artifact_digest:
+        try:
+            code, code_bytes = load_artifact(artifact, source_path)
+            data = pyc_header(st) + code_bytes
+        except ValueError:
+            code = None
+    if code is None:
+        try:
+            code = compile(source, source_path, "exec", dont_inherit=True)
+        except (SyntaxError, ValueError) as e:
+            # Format pesan sama dengan py_compile
+            raise py_compile.PyCompileError(e.__class__, e, source_path)
+        data = pyc_payload(code, st)
+    os.makedirs(os.path.dirname(cfile) or ".", exist_ok=True)
+    tmp_path = cfile + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, cfile)
+    return digest, data, scan_imports(code), st
+
+def compile_task(task):
+    """Compiles one module and glyphifies it.
+
+    task is a dict with folder, key, source, glyph_path, digest and mode. digest is the
+    source hash the caller looked the module up under, or None on a cold build; either way
+    a compiled module reports the digest and [size, mtime_ns] ("source_stat") of the bytes
+    it actually compiled, which is what the build cache must record.
+    mode "direct" compiles straight into the glyph path and never touches __pycache__;
+    "link" and "copy" compile into __pycache__ first and then hardlink or copy.
+    When the task has a "codec" (pipelined bundle), the glyph bytes are also compressed into
+    a pak entry under "entry"; "cached" tasks skip compilation and only read the glyph.
+    Compiled modules report their raw imports under "imports" for the import graph.
+    "artifact" (bytes from the ArtifactCache) is used instead of compiling; with "publish"
+    the freshly compiled code comes back under "artifact" for upload.
+    "timings" holds the seconds spent per stage (compile, copy, hash, compress) for metrics.
+    Returns a result dict; "error" is None on success.
+    """
+    source_path, glyph_path = task["source"], task["glyph_path"]
+    result = {"folder": task["folder"], "key": task["key"], "glyph": os.path.basename(glyph_path),
+              "digest": task["digest"], "glyph_sha256": None, "size": 0, "error": None,
+              "cached": task.get("cached", False), "entry": None, "imports": None, "timings": {},
+              "artifact": None, "source_stat": None}
+    timings = result["timings"]
+    publish = False
+    t0 = time.perf_counter()
+    try:
+        mode = task.get("mode", "direct")
+        if result["cached"]:
+            # Glyph dari cache sudah ada, hanya dibaca untuk bundle
+            if result["digest"] is None:
+                result["digest"] = file_hash(source_path)
+            with open(glyph_path, "rb") as f:
+                data = f.read()
+            timings["read"] = time.perf_counter() - t0
+        elif mode == "direct":
+            # Satu kali tulis per glyph, tanpa baca ulang untuk hash/bundle
+            digest, data, result["imports"], st = compile_source(source_path, glyph_path, task.get("artifact"),
+                                                                 task["digest"])
+            timings["load" if task.get("artifact") else "compile"] = time.perf_counter() - t0
+        else:
+            pyc_path = importlib.util.cache_from_source(source_path)
+            digest, data, result["imports"], st = compile_source(source_path, pyc_path, task.get("artifact"),
+                                                                 task["digest"])
+            t1 = time.perf_counter()
+            timings["load" if task.get("artifact") else "compile"] = t1 - t0
+            place_glyph(pyc_path, glyph_path, mode)
+            timings["copy"] = time.perf_counter() - t1
+        if not result["cached"]:
+            # Source bisa berubah sejak lookup: hash & stat harus dari bytes yang di-compile
+            publish = task.get("publish") and digest == result["digest"]
+            result["digest"], result["source_stat"] = digest, [st.st_size, st.st_mtime_ns]
+        t1 = time.perf_counter()
+        result["glyph_sha256"] = hashlib.sha256(data).hexdigest()
+        result["size"] = len(data)
+        t2 = time.perf_counter()
+        timings["hash"] = t2 - t1
+        if task.get("codec"):
+            result["entry"] = make_entry(result["glyph"], data, task["codec"], task.get("level"))
+            timings["compress"] = time.perf_counter() - t2
+        if publish:
+            result["artifact"] = pack_artifact(source_path, data[16:])
+    except py_compile.PyCompileError as e:
+        result["error"] = f"Error compiling {source_path}: {e.msg}"
+    except FileNotFoundError:
+        result["error"] = f"Error: Source file not found - {source_path}"
+    except PermissionError:
+        result["error"] = f"Error: Permission denied for {source_path} or {glyph_path}"
+    except Exception as e:
+        result["error"] = f"General Error glyphifying {source_path}: {e}"
+    return result
+
+def run_batch(task_func, batch):
+    """Runs one chunk of tasks inside a pool worker."""
+    return [task_func(task) for task in batch]
+
+def resolve_jobs(jobs):
+    """0 or None means one worker per CPU core."""
+    if not jobs or jobs < 0:
+        return os.cpu_count() or 1
+    return jobs
+
+class ParallelCompiler:
+    """Runs compile tasks from every shrine on one process pool, streaming results back."""
+
+    def __init__(self, jobs=None, chunksize=None):
+        self.jobs = resolve_jobs(jobs)
+        self.chunksize = chunksize
+        self._cancelled = False
+
+    def cancel(self):
+        """Requests cancellation; the pool is terminated by the thread running run()."""
+        self._cancelled = True
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    def _chunksize_for(self, count):
+        if self.chunksize:
+            return self.chunksize
+        # ~4 batch per worker: cukup besar untuk mengurangi IPC, cukup kecil untuk load balancing
+        return max(1, min(MAX_CHUNKSIZE, count // (self.jobs * 4)))
+
+    def run(self, tasks, on_result, task_func=compile_task, ordered=False, max_pending=None):
+        """Runs every task, calling on_result(result) in the caller's thread.
+
+        ordered=True delivers results in task order (for streaming into a deterministic bundle).
+        max_pending bounds the tasks handed to the pool but not yet passed to on_result, so a
+        slow on_result throttles the workers instead of buffering every result in memory; at
+        least two batches per worker stay in flight (smaller batches if needed) so it never
+        serializes the pool.
+        Returns False if the run was cancelled before all results arrived.
+        """
+        tasks = list(tasks)
+        if not tasks:
+            return not self._cancelled
+
+        if self.jobs == 1 or len(tasks) <= INLINE_TASKS:
+            # Tanpa pool: hindari biaya spawn proses untuk pekerjaan kecil
+            for task in tasks:
+                if self._cancelled:
+                    return False
+                on_result(task_func(task))
+            return True
+
+        # Batch dibuat sendiri (bukan chunksize= milik imap) agar iterator tetap mendukung next(timeout)
+        chunksize = self._chunksize_for(len(tasks))
+        slots = None
+        if max_pending:
+            # Batch dikecilkan agar 2 batch per worker muat dalam max_pending: memori tetap
+            # terbatas tanpa membuat pool menunggu satu batch selesai
+            chunksize = max(1, min(chunksize, max_pending // (2 * self.jobs)))
+            slots = threading.Semaphore(max(2 * self.jobs, max_pending // chunksize))
+        batches = [tasks[i:i + chunksize] for i in range(0, len(tasks), chunksize)]
+
+        def feed():
+            # Dibaca thread task-handler milik pool; berhenti menunggu slot saat antrian penuh
+            for batch in batches:
+                if slots is not None:
+                    slots.acquire()
+                yield batch
+
+        pool = multiprocessing.Pool(processes=min(self.jobs, len(batches)))
+        try:
+            imap = pool.imap if ordered else pool.imap_unordered
+            results = imap(functools.partial(run_batch, task_func), feed())
+            for _ in range(len(batches)):
+                while True:
+                    if self._cancelled:
+                        return False
+                    try:
+                        batch_results = results.next(timeout=POLL_INTERVAL)
+                        break
+                    except multiprocessing.TimeoutError:
+                        continue
+                for result in batch_results:
+                    on_result(result)
+                if slots is not None:
+                    slots.release()
+            pool.close()
+            return True
+        finally:
+            if slots is not None:
+                slots.release(len(batches)) # lepaskan feed() yang menunggu agar terminate() tidak macet
+            # terminate() menghentikan worker yang masih berjalan saat dibatalkan
+            pool.terminate()
+            pool.join()
@@ -0,0 +1,179 @@
+import os, sys, io, json, time, shutil, random, resource, tempfile, argparse, platform, contextlib, multiprocessing
+
+from ShrineCore import ShrineBuild
+from ShrineBundler import build_pak
+from GlyphValidator import validate_glyphs
+
+# Benchmark headless untuk pipeline compile → glyphify → bundle → validate
+
+def generate_tree(root, files=1000, file_size=4096, depth=3, seed=0):
+    """Writes a synthetic shrine of `files` modules (~file_size bytes each) nested `depth` packages deep."""
+    rng = random.Random(seed)
+    packages = [root]
+    for level in range(depth):
+        pkg = os.path.join(packages[-1], f"pkg{level}")
+        os.makedirs(pkg, exist_ok=True)
+        with open(os.path.join(pkg, "__init__.py"), "w", encoding="utf-8") as f:
+            f.write(f"LEVEL = {level}\n")
+        packages.append(pkg)
+
+    total = 0
+    for i in range(files):
+        lines = [f"# synthetic module {i}", "import os", ""]
+        n = 0
+        while sum(len(l) + 1 for l in lines) < file_size:
+            lines.append(f"def func_{n}(x, y={rng.randint(0, 999)}):")
+            lines.append(f"    value = [x * k + y for k in range({rng.randint(1, 50)})]")
+            lines.append(f"    return sum(value) if value else {rng.random():.6f}")
+            lines.append("")
+            n += 1
+        data = "\n".join(lines) + "\n"
+        with open(os.path.join(packages[i % len(packages)], f"mod_{i}.py"), "w", encoding="utf-8") as f:
+            f.write(data)
+        total += len(data)
+    return total
+
+def _usage():
+    self_ru = resource.getrusage(resource.RUSAGE_SELF)
+    child_ru = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = self_ru.ru_utime + self_ru.ru_stime + child_ru.ru_utime + child_ru.ru_stime
+    # ru_maxrss dalam KiB di Linux
+    return cpu, self_ru.ru_maxrss, child_ru.ru_maxrss
+
+def _stage_child(func, conn):
+    try:
+        cpu0, _, _ = _usage()
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            func()
+        wall = time.perf_counter() - t0
+        cpu1, rss_self, rss_children = _usage()
+        conn.send((wall, cpu1 - cpu0, rss_self, rss_children, None))
+    except BaseException as e:
+        conn.send((None, None, None, None, f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+def measure(name, func, files, nbytes):
+    """Runs func in a fresh forked process so the ru_maxrss peaks belong to this stage alone.
+
+    peak_rss_kb is the stage process (including the interpreter it forked from),
+    peak_rss_children_kb the largest pool worker the stage started.
+    """
+    parent_conn, child_conn = multiprocessing.Pipe(duplex=False)
+    # fork: stage berupa lambda dan resource/ru_maxrss memang hanya ada di Unix
+    proc = multiprocessing.get_context("fork").Process(target=_stage_child, args=(func, child_conn))
+    proc.start()
+    child_conn.close()
+    try:
+        wall, cpu, rss_self, rss_children, error = parent_conn.recv()
+    except EOFError:
+        error = "proses stage berhenti tanpa hasil"
+    proc.join()
+    if error:
+        raise RuntimeError(f"Stage {name} gagal: {error}")
+    result = {
+        "wall_s": round(wall, 4),
+        "cpu_s": round(cpu, 4),
+        "peak_rss_kb": rss_self,
+        "peak_rss_children_kb": rss_children,
+        "files": files,
+        "bytes": nbytes,
+        "files_per_s": round(files / wall, 1) if wall > 0 else None,
+        "mb_per_s": round(nbytes / (1024 * 1024) / wall, 2) if wall > 0 else None,
+    }
+    print(f"⏱️ {name:<10} {wall:8.3f}s wall {result['cpu_s']:8.3f}s cpu "
+          f"{result['files_per_s'] or 0:10.1f} files/s {result['mb_per_s'] or 0:8.2f} MB/s")
+    return result
+
+def _folder_size(folder):
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(folder) for f in files)
+
+def run_benchmark(files, file_size, depth, jobs, codec, workdir):
+    src = os.path.join(workdir, "src")
+    out = os.path.join(workdir, "out")
+    manifest_path = os.path.join(workdir, "manifest_glyph.db")
+    os.makedirs(src)
+    source_bytes = generate_tree(src, files, file_size, depth)
+    module_count = sum(1 for _, _, fs in os.walk(src) for f in fs if f.endswith(".py"))
+
+    quiet = lambda message: None
+    stages = {}
+    stages["compile"] = measure("compile", lambda: ShrineBuild(
+        [src], manifest_path, jobs=jobs, output_dir=out, log=quiet).run(), module_count, source_bytes)
+    stages["recompile"] = measure("recompile", lambda: ShrineBuild(
+        [src], manifest_path, jobs=jobs, output_dir=out, log=quiet).run(), module_count, source_bytes)
+
+    glyph_folder = os.path.join(out, ".glyphs")
+    glyph_bytes = _folder_size(glyph_folder)
+    stages["bundle"] = measure("bundle", lambda: build_pak(
+        glyph_folder, manifest_path, os.path.join(workdir, "bundle"), codec=codec, jobs=jobs), module_count, glyph_bytes)
+    stages["validate"] = measure("validate", lambda: validate_glyphs(
+        manifest_path, glyph_folder, full=True), module_count, glyph_bytes)
+    # Compile + bundle dalam satu pass (cold, output terpisah) untuk dibandingkan dengan compile + bundle
+    stages["pipeline"] = measure("pipeline", lambda: ShrineBuild(
+        [src], os.path.join(workdir, "manifest_pipeline.db"), jobs=jobs, output_dir=os.path.join(workdir, "out_pipeline"),
+        log=quiet, bundle_dir=os.path.join(workdir, "bundle_pipeline"), bundle_codec=codec).run(),
+        module_count, source_bytes)
+
+    return {
+        "meta": {
+            "files": files, "file_size": file_size, "depth": depth, "jobs": jobs, "codec": codec,
+            "python": platform.python_version(), "platform": platform.platform(), "cpu_count": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "stages": stages,
+    }
+
+def compare(results, baseline, threshold):
+    """Returns the list of stages whose wall time regressed by more than threshold (0.10 = 10%)."""
+    regressions = []
+    for stage, current in results["stages"].items():
+        base = baseline.get("stages", {}).get(stage)
+        if not base or not base.get("wall_s"):
+            continue
+        change = (current["wall_s"] - base["wall_s"]) / base["wall_s"]
+        marker = "❌" if change > threshold else "✅"
+        print(f"{marker} {stage:<10} {base['wall_s']:8.3f}s → {current['wall_s']:8.3f}s ({change:+.1%})")
+        if change > threshold:
+            regressions.append(stage)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the compile → glyphify → bundle → validate pipeline.")
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--file-size", type=int, default=4096, help="approximate bytes per module")
+    parser.add_argument("--depth", type=int, default=3, help="package nesting depth")
+    parser.add_argument("-j", "--jobs", type=int, default=0)
+    parser.add_argument("-c", "--codec", default="deflate")
+    parser.add_argument("-o", "--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="previous results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed wall-time regression (0.10 = 10%%)")
+    parser.add_argument("--workdir", help="keep the generated tree here instead of a temp dir")
+    args = parser.parse_args(argv)
+
+    if args.workdir and os.path.exists(args.workdir) and os.listdir(args.workdir):
+        print(f"⛔ Workdir tidak kosong: {args.workdir}")
+        return 2
+    workdir = args.workdir or tempfile.mkdtemp(prefix="shrine_bench_")
+    os.makedirs(workdir, exist_ok=True)
+    try:
+        results = run_benchmark(args.files, args.file_size, args.depth, args.jobs, args.codec, workdir)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"📄 Hasil disimpan: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"⛔ Regresi: {', '.join(regressions)}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,9 @@
-import zipfile, os
+import zipfile, os, sys, json, time, queue, argparse, threading
 from datetime import datetime
+from BuildCache import file_hash
+from GlyphManifest import GlyphManifest, MANIFEST_PATH
+from ParallelCompiler import ParallelCompiler
+from ShrinePak import INDEX_NAME, PakWriter, available_codecs, make_entry, write_pak
 
 def bundle_glyphs(glyph_folder, manifest_path, output_folder="output/bundle"):
     if not os.path.exists(glyph_folder):
@@ -22,10 +26,159 @@ def bundle_glyphs(glyph_folder, manifest_path, output_folder="output/bundle"):
 
         # Tambahkan manifest
         if os.path.exists(manifest_path):
-            shrine_zip.write(manifest_path, arcname="manifest_glyph.txt")
+            shrine_zip.write(manifest_path, arcname=os.path.basename(manifest_path))
             print("📜 Manifest ditambahkan.")
 
     print(f"\n✅ Bundle sukses: {bundle_path}")
 
+def compress_glyph(task):
+    """Pool task: reads one glyph and returns its pre-compressed pak entry."""
+    file_path, arcname, codec, level = task
+    with open(file_path, "rb") as f:
+        return make_entry(arcname, f.read(), codec, level)
+
+def build_index(entries, manifest_path, modules=None):
+    """Deterministic index member: arcname -> sha256, size and (if known) import name.
+
+    modules maps glyph name -> (module, is_package); when omitted it is read from the manifest.
+    """
+    if modules is None and manifest_path and os.path.exists(manifest_path):
+        with GlyphManifest(manifest_path) as manifest:
+            modules = {row["glyph"]: (row["module"], os.path.basename(row["source"]) == "__init__.py")
+                       for row in manifest.current_glyphs()}
+    modules = modules or {}
+    members = {}
+    for entry in entries:
+        info = {"sha256": entry["sha256"], "size": entry["size"]}
+        module = modules.get(os.path.basename(entry["name"]))
+        if module is not None:
+            info["module"] = module[0]
+            if module[1]:
+                info["package"] = True
+        members[entry["name"]] = info
+    data = json.dumps({"format": 1, "members": members}, sort_keys=True, separators=(",", ":"))
+    return data.encode("utf-8")
+
+def publish_bundle(tmp_path, output_folder):
+    """Renames a finished temp bundle to shrine_bundle_<sha256[:16]>.pak and returns the path."""
+    bundle_path = os.path.join(output_folder, f"shrine_bundle_{file_hash(tmp_path)[:16]}.pak")
+    os.replace(tmp_path, bundle_path)
+    return bundle_path
+
+class BundleStream:
+    """Streams pre-compressed members into a deterministic .pak while the build is still running.
+
+    A writer thread drains a bounded queue into a PakWriter; put() blocks once max_pending
+    members are waiting, which in turn holds back the compile pool (back-pressure). Members
+    must arrive in name order, so the result is byte-identical to build_pak on the same glyphs.
+    """
+
+    def __init__(self, output_folder, codec="deflate", level=None, max_pending=64):
+        os.makedirs(output_folder, exist_ok=True)
+        self.output_folder = output_folder
+        self.codec = codec
+        self.level = level
+        self.tmp_path = os.path.join(output_folder, f".shrine_bundle_{os.getpid()}.tmp")
+        self.members = []
+        self.error = None
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._writer = PakWriter(self.tmp_path)
+        self._thread = threading.Thread(target=self._drain, daemon=True)
+        self._thread.start()
+
+    def _drain(self):
+        while True:
+            entry = self._queue.get()
+            if entry is None:
+                break
+            if self.error is not None:
+                continue # tetap kosongkan antrian agar put() tidak macet
+            try:
+                self._writer.add(entry)
+                self.members.append({"name": entry["name"], "sha256": entry["sha256"], "size": entry["size"]})
+            except (OSError, ValueError) as e:
+                self.error = e
+
+    def put(self, entry):
+        self._queue.put(entry)
+
+    def _stop(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def finish(self, modules):
+        """Appends the index (modules: glyph name -> (module, is_package)) and returns the bundle path."""
+        self._stop()
+        if self.error is None:
+            try:
+                index = build_index(self.members, None, modules)
+                self._writer.add(make_entry(INDEX_NAME, index, self.codec, self.level))
+            except (OSError, ValueError) as e:
+                self.error = e
+        self._writer.close()
+        if self.error is not None:
+            os.remove(self.tmp_path)
+            raise self.error
+        return publish_bundle(self.tmp_path, self.output_folder)
+
+    def abort(self):
+        self._stop()
+        self._writer.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+def build_pak(glyph_folder, manifest_path=MANIFEST_PATH, output_folder="output/bundle",
+              codec="deflate", level=None, jobs=0):
+    """Parallel, deterministic bundle: members are compressed on a process pool, then assembled in order.
+
+    Member order is sorted and timestamps are zeroed, so identical glyphs always produce a
+    byte-identical .pak, named after its own SHA-256. The manifest is summarised into
+    shrine_index.json instead of being copied, because the database changes on every run.
+    """
+    if not os.path.exists(glyph_folder):
+        print("⛔ Folder glyph tidak ditemukan.")
+        return None
+    if codec not in available_codecs():
+        print(f"⛔ Codec tidak tersedia: {codec} (pilihan: {', '.join(available_codecs())})")
+        return None
+
+    started = time.perf_counter()
+    tasks = []
+    for root, _, files in os.walk(glyph_folder):
+        for file in files:
+            file_path = os.path.join(root, file)
+            arcname = os.path.relpath(file_path, glyph_folder).replace(os.sep, "/")
+            tasks.append((file_path, arcname, codec, level))
+
+    entries = []
+    ParallelCompiler(jobs=jobs).run(tasks, entries.append, task_func=compress_glyph)
+    entries.append(make_entry(INDEX_NAME, build_index(entries, manifest_path), codec, level))
+
+    os.makedirs(output_folder, exist_ok=True)
+    tmp_path = os.path.join(output_folder, f".shrine_bundle_{os.getpid()}.tmp")
+    write_pak(tmp_path, entries)
+    bundle_path = publish_bundle(tmp_path, output_folder)
+
+    raw_size = sum(e["size"] for e in entries)
+    print(f"✅ Bundle sukses: {bundle_path} ({len(entries) - 1} glyph, {codec}, "
+          f"{raw_size} → {os.path.getsize(bundle_path)} bytes, {time.perf_counter() - started:.2f}s)")
+    return bundle_path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bundle glyphs into a .pak archive.")
+    parser.add_argument("glyph_folder", nargs="?", default="output/.glyphs")
+    parser.add_argument("-m", "--manifest", default=MANIFEST_PATH)
+    parser.add_argument("-o", "--output", default="output/bundle")
+    parser.add_argument("-c", "--codec", default="deflate", choices=available_codecs())
+    parser.add_argument("-l", "--level", type=int, default=None, help="compression level for the codec")
+    parser.add_argument("-j", "--jobs", type=int, default=0, help="compression processes (0 = one per core)")
+    parser.add_argument("--legacy", action="store_true",
+                        help="single-threaded timestamped bundle that embeds the manifest file")
+    args = parser.parse_args(argv)
+    if args.legacy:
+        bundle_glyphs(args.glyph_folder, args.manifest, args.output)
+        return 0
+    return 0 if build_pak(args.glyph_folder, args.manifest, args.output, args.codec, args.level, args.jobs) else 1
+
 if __name__ == "__main__":
-    bundle_glyphs("output/.glyphs", "manifest_glyph.txt")
\ No newline at end of file
+    sys.exit(main())
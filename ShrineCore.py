@@ -0,0 +1,391 @@
+import os, time, marshal, functools
+
+from BuildCache import BuildCache, CACHE_NAME, iter_sources, file_hash
+from GlyphManifest import GlyphManifest
+from GlyphNames import GlyphNameIndex, naming_fingerprint
+from ParallelCompiler import ParallelCompiler, GLYPH_MODES
+from ShrineJournal import BuildJournal, journal_path_for, resume
+from ShrineBundler import BundleStream
+from ImportGraph import scan_imports, resolve_imports
+from ShrineMetrics import Metrics
+
+# Core compile + glyphify + manifest tanpa dependensi Qt, dipakai GUI dan CLI
+
+def shrine_id(folder, output_dir=None):
+    """Per-shrine prefix of the naming key.
+
+    Without an output dir every shrine has its own .glyphs, so the folder name is enough.
+    Shrines sharing an output dir are named by their path relative to the deepest folder they
+    share with it (a/src, b/src for -o out next to a and b), which is unique per shrine and
+    the same on every machine with the same layout.
+    """
+    folder = os.path.abspath(folder)
+    if output_dir:
+        rel = os.path.relpath(folder, os.path.commonpath([folder, os.path.abspath(output_dir)]))
+        if rel != os.curdir:
+            return rel.replace(os.sep, "/")
+    return os.path.basename(folder)
+
+def naming_key(folder, key, output_dir=None):
+    """Platform-independent key the glyph name is derived from: <shrine id>/<relative path>."""
+    return shrine_id(folder, output_dir) + "/" + key.replace(os.sep, "/")
+
+def module_name(key):
+    """Maps a shrine-relative source path (pkg/sub/mod.py) to its import name (pkg.sub.mod)."""
+    parts = os.path.splitext(key)[0].split(os.sep)
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    return ".".join(parts)
+
+def glyph_folder_for(folder, output_dir=None, target=""):
+    """Glyphs go to <folder>/.glyphs, or <output_dir>/.glyphs when an output dir is given.
+
+    Build matrix targets get a sibling folder per tag (.glyphs-cpython-311.opt-1), so bundling
+    one glyph set never picks up another.
+    """
+    return os.path.join(output_dir or folder, f".glyphs-{target}" if target else ".glyphs")
+
+# Langkah bersama ShrineBuild dan MatrixBuild (per shrine / per cache target)
+
+def claim_names(names, folder, output_dir, glyph_folder, log):
+    """Claims folder's naming-key prefix in names; logs and returns False when another shrine holds it."""
+    prefix = shrine_id(folder, output_dir)
+    if names.claim_shrine(prefix, folder):
+        return True
+    # Dua shrine dengan prefix nama sama di satu folder glyph akan saling menimpa
+    log(f"❌ Error: {folder} memakai nama glyph yang sama dengan {names.shrines[prefix]} di {glyph_folder}")
+    return False
+
+def load_cache(cache, glyph_folder, names, folder, output_dir, log, label=""):
+    """Resumes an interrupted run's journal into cache and reserves the glyph names it holds.
+
+    Entries whose name now belongs to another module (or that another target named differently)
+    are dropped, so the module is recompiled under a fresh name. label tags the resume message.
+    """
+    recovered = resume(cache, glyph_folder)
+    if recovered:
+        log(f"↩️ Resume {folder}{label}: {recovered} modul dari run yang terputus")
+    for key in list(cache.entries):
+        glyph_name, module_key = cache.glyph_name(key), naming_key(folder, key, output_dir)
+        if glyph_name and (names.by_module.get(module_key, glyph_name) != glyph_name
+                           or not names.reserve(glyph_name, module_key)):
+            del cache.entries[key]
+
+def record_glyph(manifest, run_id, folder, key, glyph_path, glyph_sha256, target=""):
+    """Adds the glyph of shrine-relative key to the manifest run."""
+    manifest.add_glyph(run_id, os.path.abspath(folder), os.path.abspath(os.path.join(folder, key)),
+                       module_name(key), os.path.basename(glyph_path), os.path.abspath(glyph_path), glyph_sha256,
+                       target=target)
+
+def store_glyph(cache, journal, glyph_folder, key, source_stat, digest, glyph_name, glyph_sha256):
+    """Records a compiled module in the build cache and journal, deleting its glyph under an older name."""
+    old_glyph = cache.entries.get(key, {}).get("glyph")
+    if old_glyph and old_glyph != glyph_name:
+        # Nama berubah (mis. salt baru): glyph lama jadi yatim, hapus
+        old_path = os.path.join(glyph_folder, old_glyph)
+        if os.path.exists(old_path):
+            os.remove(old_path)
+    cache.record(key, source_stat, digest, glyph_name, glyph_sha256)
+    journal.append(key, cache.entries[key])
+
+def drop_stale(stale, folder, glyph_folder, names, manifest, output_dir=None, target=None):
+    """Removes the glyphs, names and manifest rows of {key: glyph_name} entries dropped from a cache."""
+    for key, stale_glyph in stale.items():
+        stale_path = os.path.join(glyph_folder, stale_glyph or "")
+        if stale_glyph and os.path.exists(stale_path):
+            os.remove(stale_path)
+        names.release(naming_key(folder, key, output_dir))
+        manifest.remove_source(os.path.abspath(os.path.join(folder, key)), target)
+
+class ShrineBuild:
+    """One compile run over a list of shrine folders.
+
+    log receives summary messages and detail receives one line per glyph (defaults to log);
+    progress, if given, is called as progress(done, total, bytes_written). All callbacks
+    run in the thread calling run() and must be cheap (the GUI buffers them in LogPipeline).
+    glyph_mode is "direct" (compile straight into .glyphs, __pycache__ untouched), "link"
+    (hardlink/reflink from __pycache__, falling back to a copy) or "copy". Glyph names are
+    derived from glyph_salt and the module path, so they are identical across runs and machines.
+    Every finished module is journaled next to the build cache; if a run dies, the next run
+    resumes from the journal instead of rebuilding everything.
+
+    With bundle_dir set, the run is pipelined: each glyph is compressed by the worker that
+    compiled it and streamed, in glyph-name order, into a deterministic .pak in bundle_dir
+    while compilation continues (see BundleStream). The path ends up in bundle_path.
+
+    metrics (a ShrineMetrics.Metrics, created when not given) collects stage timings, the
+    per-file compile/copy/hash/compress times reported by the workers and file/byte counters.
+
+    artifact_cache (an ArtifactCache.ArtifactCache) is a content-addressed store shared between
+    build agents: modules missing from the local build cache are looked up there in one batch
+    before compiling, hits skip the compile step and freshly compiled code is uploaded.
+    """
+
+    def __init__(self, folders, manifest_path, jobs=0, output_dir=None, log=print, detail=None, progress=None,
+                 glyph_mode="direct", glyph_salt="", bundle_dir=None, bundle_codec="deflate", bundle_level=None,
+                 metrics=None, artifact_cache=None):
+        if glyph_mode not in GLYPH_MODES:
+            raise ValueError(f"glyph_mode harus salah satu dari {', '.join(GLYPH_MODES)}")
+        self.folders = folders
+        self.glyph_mode = glyph_mode
+        self.glyph_salt = glyph_salt
+        self.names = {} # glyph folder -> GlyphNameIndex (beberapa shrine bisa berbagi output dir)
+        self.manifest_path = manifest_path
+        self.output_dir = output_dir
+        self.log = log
+        self.detail = detail or log
+        self.progress = progress or (lambda done, total, nbytes: None)
+        self.engine = ParallelCompiler(jobs=jobs)
+        self.bundle_dir = bundle_dir
+        self.bundle_codec = bundle_codec
+        self.bundle_level = bundle_level
+        self.bundle_path = None
+        self.metrics = metrics or Metrics()
+        self.artifacts = artifact_cache
+        self.errors = 0
+        self.cancelled = False
+
+    def cancel(self):
+        """Safe to call from another thread; running pool workers are terminated."""
+        self.cancelled = True
+        self.engine.cancel()
+
+    def module_for(self, glyph):
+        """Reverse lookup for debugging: glyph file name -> shrine-relative module path."""
+        for index in self.names.values():
+            module = index.module_for(glyph)
+            if module is not None:
+                return module
+        return None
+
+    def _fetch_artifacts(self, tasks):
+        """Looks every task that must be compiled up in the artifact cache with one batched fetch."""
+        pending = {}
+        for task in tasks:
+            if task.get("cached"):
+                continue
+            if task["digest"] is None:
+                # Kunci artefak butuh hash source sebelum task dikirim ke pool
+                try:
+                    task["digest"] = file_hash(task["source"])
+                except OSError:
+                    continue # worker yang melaporkan errornya
+            pending.setdefault(self.artifacts.key(task["digest"]), []).append(task)
+        found = self.artifacts.fetch(pending)
+        for key, group in pending.items():
+            for task in group:
+                if key in found:
+                    task["artifact"] = found[key]
+                else:
+                    task["publish"] = True
+
+    def run(self, changed=None, force=False):
+        """Compiles every shrine and returns the list of glyph folders that received glyphs.
+
+        changed optionally maps folder -> iterable of touched paths (watch mode). Only those
+        modules are checked; paths that no longer exist (files or whole directories) have
+        their glyphs, cache entries and manifest rows removed. force=True recompiles the
+        selected modules even when the build cache has them (rebuild-affected mode).
+        Imports of every compiled module are indexed in the manifest (see ImportGraph).
+        """
+        self.metrics.start()
+        try:
+            return self._run(changed, force)
+        finally:
+            self.metrics.stop()
+
+    def _run(self, changed, force):
+        metrics = self.metrics
+        started = time.perf_counter()
+        successful_output_folders = []
+        with GlyphManifest(self.manifest_path) as manifest:
+            run_id = manifest.begin_run()
+            record = functools.partial(record_glyph, manifest, run_id)
+
+            def record_imports(folder, key, digest, imports):
+                module = module_name(key)
+                names = resolve_imports(module, os.path.basename(key) == "__init__.py", imports)
+                manifest.set_imports(os.path.abspath(folder), os.path.abspath(os.path.join(folder, key)),
+                                     module, digest, names)
+
+            # Kumpulkan semua modul dari semua shrine ke satu antrian kerja
+            shrines = {}
+            tasks = []
+            pipelined = self.bundle_dir is not None and changed is None
+            bundle = {"codec": self.bundle_codec, "level": self.bundle_level} if pipelined else {}
+            stats = {"done": 0, "total": 0, "bytes": 0}
+            for folder in (self.folders if changed is None else list(changed)):
+                if self.cancelled:
+                    break
+
+                if changed is None:
+                    self.log(f"📦 Shrine: {folder}")
+
+                cloak_folder = glyph_folder_for(folder, self.output_dir)
+                names = self.names.setdefault(cloak_folder, GlyphNameIndex(self.glyph_salt))
+                if not claim_names(names, folder, self.output_dir, cloak_folder, self.log):
+                    self.errors += 1
+                    continue
+                os.makedirs(cloak_folder, exist_ok=True)
+                cache = BuildCache(os.path.join(folder, CACHE_NAME), naming=naming_fingerprint(self.glyph_salt))
+                load_cache(cache, cloak_folder, names, folder, self.output_dir, self.log)
+
+                removed = []
+                try:
+                    if changed is None:
+                        sources = list(iter_sources(folder))
+                    else:
+                        touched = sorted(set(changed[folder]))
+                        sources = [p for p in touched if p.endswith(".py") and os.path.isfile(p)]
+                        removed = [os.path.relpath(p, folder) for p in touched if not os.path.exists(p)]
+                except Exception as e:
+                    self.errors += 1
+                    self.log(f"❌ Error compiling {folder}: {e}")
+                    continue # Skip to next folder if it cannot be scanned
+
+                shrine = {"cache": cache, "cloak": cloak_folder, "names": names, "keys": [], "found": False,
+                          "removed": removed, "journal": BuildJournal(journal_path_for(cache.path))}
+                shrines[folder] = shrine
+                indexed = manifest.import_hashes(os.path.abspath(folder))
+                for source_path in sources:
+                    key = os.path.relpath(source_path, folder)
+                    shrine["keys"].append(key)
+                    stats["total"] += 1
+                    try:
+                        glyph_name, digest = (None, None) if force else cache.lookup(key, source_path, cloak_folder)
+                        if glyph_name is not None:
+                            glyph_path = os.path.join(cloak_folder, glyph_name)
+                            record(folder, key, glyph_path, cache.glyph_hash(key) or file_hash(glyph_path))
+                            if indexed.get(os.path.abspath(source_path)) != digest:
+                                # Modul dari cache tanpa indeks import (mis. manifest lama): baca dari glyph-nya
+                                with open(glyph_path, "rb") as f:
+                                    record_imports(folder, key, digest, scan_imports(marshal.loads(f.read()[16:])))
+                            shrine["found"] = True
+                            stats["done"] += 1
+                            metrics.count("files_cached")
+                            if pipelined:
+                                # Glyph dari cache tetap harus masuk bundle, lewat pool yang sama
+                                tasks.append({"folder": folder, "key": key, "source": source_path, "digest": digest,
+                                              "glyph_path": glyph_path, "cached": True, **bundle})
+                            continue
+                    except OSError as e:
+                        self.errors += 1
+                        self.log(f"❌ Error: {source_path}: {e}")
+                        continue
+                    glyph_name = names.name_for(naming_key(folder, key, self.output_dir))
+                    tasks.append({"folder": folder, "key": key, "source": source_path, "digest": digest,
+                                  "glyph_path": os.path.join(cloak_folder, glyph_name), "mode": self.glyph_mode,
+                                  **bundle})
+
+            stream = None
+            modules = {}
+            metrics.count("files_total", stats["total"])
+            metrics.add_stage("scan", time.perf_counter() - started)
+            if self.artifacts is not None and tasks:
+                t0 = time.perf_counter()
+                self._fetch_artifacts(tasks)
+                metrics.add_stage("artifacts", time.perf_counter() - t0)
+            if pipelined:
+                # Urutan nama glyph = urutan member .pak; hasil pool diterima berurutan (imap)
+                tasks.sort(key=lambda t: os.path.basename(t["glyph_path"]))
+                stream = BundleStream(self.bundle_dir, self.bundle_codec, self.bundle_level)
+            if changed is None:
+                self.log(f"⚙️ Compiling {len(tasks)} module(s) on {self.engine.jobs} worker(s)...")
+            self.progress(stats["done"], stats["total"], stats["bytes"])
+
+            def on_result(result):
+                metrics.add_file(os.path.join(result["folder"], result["key"]), result["timings"])
+                if stream is not None and result["entry"] is not None:
+                    metrics.count("bytes_bundled", len(result["entry"]["payload"]))
+                    stream.put(result["entry"]) # blok saat antrian penuh: back-pressure ke pool
+                    modules[result["glyph"]] = (module_name(result["key"]),
+                                                os.path.basename(result["key"]) == "__init__.py")
+                if result["cached"]:
+                    if result["error"]:
+                        self.errors += 1
+                        self.log(f"❌ {result['error']}")
+                    return
+                stats["done"] += 1
+                stats["bytes"] += result["size"]
+                self.progress(stats["done"], stats["total"], stats["bytes"])
+                if result["error"]:
+                    self.errors += 1
+                    metrics.count("files_failed")
+                    self.log(f"❌ {result['error']}")
+                    return
+                folder, key, glyph_name = result["folder"], result["key"], result["glyph"]
+                shrine = shrines[folder]
+                glyph_path = os.path.join(shrine["cloak"], glyph_name)
+                store_glyph(shrine["cache"], shrine["journal"], shrine["cloak"], key, result["source_stat"],
+                            result["digest"], glyph_name, result["glyph_sha256"])
+                record(folder, key, glyph_path, result["glyph_sha256"])
+                if result["imports"] is not None:
+                    record_imports(folder, key, result["digest"], result["imports"])
+                if result["artifact"] is not None:
+                    self.artifacts.store(self.artifacts.key(result["digest"]), result["artifact"])
+                shrine["found"] = True
+                metrics.count("files_compiled")
+                metrics.count("bytes_written", result["size"])
+                self.detail(f"✅ Glyphified: {glyph_name}")
+
+            t0 = time.perf_counter()
+            try:
+                completed = self.engine.run(tasks, on_result, ordered=pipelined,
+                                            max_pending=64 if pipelined else None) and not self.cancelled
+            except BaseException:
+                if stream is not None:
+                    stream.abort()
+                raise
+            metrics.add_stage("compile", time.perf_counter() - t0)
+            if not completed:
+                self.cancelled = True
+                self.log("Kompilasi dibatalkan.")
+            if self.artifacts is not None:
+                t0 = time.perf_counter()
+                self.artifacts.flush() # modul yang sudah selesai tetap berguna untuk agent lain
+                metrics.add_stage("artifacts", time.perf_counter() - t0)
+                metrics.count("artifact_hits", self.artifacts.hits)
+                metrics.count("artifact_misses", self.artifacts.misses)
+                metrics.count("artifact_uploaded", self.artifacts.uploaded)
+                if self.artifacts.error:
+                    self.log(f"❌ Artifact cache dinonaktifkan: {self.artifacts.error}")
+                elif changed is None:
+                    self.log(f"🗄️ Artifact cache: {self.artifacts.summary()}")
+            t0 = time.perf_counter()
+            if stream is not None:
+                if completed and not self.errors:
+                    try:
+                        self.bundle_path = stream.finish(modules)
+                        self.log(f"✅ Bundle sukses: {self.bundle_path} ({len(modules)} glyph, {self.bundle_codec})")
+                    except (OSError, ValueError) as e:
+                        self.errors += 1
+                        self.log(f"❌ Bundle gagal: {e}")
+                else:
+                    stream.abort()
+                    self.log("⛔ Bundle tidak dibuat karena ada modul yang gagal atau run dibatalkan.")
+                metrics.add_stage("bundle", time.perf_counter() - t0)
+                t0 = time.perf_counter()
+
+            for folder, shrine in shrines.items():
+                cache = shrine["cache"]
+                if completed:
+                    # Hanya prune setelah run lengkap, agar run yang dibatalkan tidak menghapus glyph
+                    stale = cache.prune(shrine["keys"]) if changed is None else cache.remove(shrine["removed"])
+                    drop_stale(stale, folder, shrine["cloak"], shrine["names"], manifest, self.output_dir)
+                cache.save()
+                shrine["journal"].close(remove=True) # isinya sudah ada di cache
+                if changed is None:
+                    self.log(f"♻️ Cache {folder}: {cache.summary()}")
+
+                if shrine["found"] and shrine["cloak"] not in successful_output_folders:
+                    successful_output_folders.append(shrine["cloak"])
+                elif changed is None:
+                    self.log(f"⚠️ No .py files found in {folder} for glyphification.")
+
+            manifest.finish_run(run_id)
+            metrics.add_stage("finalize", time.perf_counter() - t0)
+
+        metrics.add_stage("total", time.perf_counter() - started)
+        if changed is None and not self.cancelled:
+            self.log("🧘‍♂️ Ritual selesai. Semua glyph disimpan.")
+        return successful_output_folders
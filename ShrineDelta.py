@@ -0,0 +1,111 @@
+import os, sys, json, hashlib, argparse
+from BuildCache import file_hash
+from ShrinePak import INDEX_NAME, PakReader, make_entry, write_pak
+
+# Delta bundle: hanya glyph yang ditambah/berubah + daftar yang dihapus, cukup untuk
+# merakit ulang .pak penuh yang byte-identik dengan target.
+
+DELTA_NAME = "shrine_delta.json"
+
+def _members(reader):
+    index = reader.index()
+    if index is None:
+        raise ValueError(f"{reader.path} tidak punya {INDEX_NAME}; buat ulang dengan ShrineBundler.build_pak")
+    return index["members"]
+
+def _same_member(base, target, name, base_meta, target_meta):
+    """True when the member's content and its stored (compressed) bytes are both identical.
+
+    apply_delta copies unchanged members raw from the base, so a member re-encoded with a
+    different codec or level counts as changed even if its content is the same.
+    """
+    if base_meta["sha256"] != target_meta["sha256"]:
+        return False
+    b, t = base.entries[name], target.entries[name]
+    if (b["method"], b["flags"] & ~0x800, b["crc"], b["size"]) != (t["method"], t["flags"] & ~0x800, t["crc"], t["size"]):
+        return False
+    return base.raw(name) == target.raw(name)
+
+def make_delta(base_pak, target_pak, delta_path):
+    """Writes a patch with the members of target_pak that differ from base_pak.
+
+    Changed members are copied still compressed, so no recompression happens.
+    Returns a summary dict.
+    """
+    with PakReader(base_pak) as base, PakReader(target_pak) as target:
+        base_members = _members(base)
+        target_members = _members(target)
+        added = sorted(n for n in target_members if n not in base_members)
+        changed = sorted(n for n in target_members if n in base_members
+                         and not _same_member(base, target, n, base_members[n], target_members[n]))
+        removed = sorted(n for n in base_members if n not in target_members)
+
+        info = {
+            "format": 1,
+            "base_sha256": file_hash(base_pak),
+            "target_sha256": file_hash(target_pak),
+            "added": added,
+            "changed": changed,
+            "removed": removed,
+        }
+        entries = [target.raw_entry(n) for n in added + changed]
+        # Index target ikut dibawa apa adanya agar hasil apply byte-identik
+        entries.append(target.raw_entry(INDEX_NAME))
+        entries.append(make_entry(DELTA_NAME, json.dumps(info, sort_keys=True, separators=(",", ":")).encode("utf-8")))
+        write_pak(delta_path, entries)
+    return info
+
+def apply_delta(base_pak, delta_path, output_path):
+    """Rebuilds the target .pak from base_pak + delta and verifies every hash."""
+    with PakReader(base_pak) as base, PakReader(delta_path) as delta:
+        info = json.loads(delta.read(DELTA_NAME))
+        if file_hash(base_pak) != info["base_sha256"]:
+            raise ValueError("Base .pak tidak cocok dengan delta ini")
+
+        target_members = json.loads(delta.read(INDEX_NAME))["members"]
+        from_delta = set(info["added"]) | set(info["changed"])
+        entries = [delta.raw_entry(INDEX_NAME)]
+        for name, meta in target_members.items():
+            source = delta if name in from_delta else base
+            data = source.read(name)
+            if hashlib.sha256(data).hexdigest() != meta["sha256"]:
+                raise ValueError(f"Hash berbeda untuk {name}")
+            entries.append(source.raw_entry(name))
+
+        tmp_path = output_path + ".tmp"
+        write_pak(tmp_path, entries)
+
+    if file_hash(tmp_path) != info["target_sha256"]:
+        os.remove(tmp_path)
+        raise ValueError("Hasil rakitan tidak cocok dengan hash target")
+    os.replace(tmp_path, output_path)
+    return info
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Create or apply delta .pak bundles.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    make = sub.add_parser("make", help="diff two bundles into a delta")
+    make.add_argument("base")
+    make.add_argument("target")
+    make.add_argument("-o", "--output", required=True)
+    apply = sub.add_parser("apply", help="rebuild the full bundle from base + delta")
+    apply.add_argument("base")
+    apply.add_argument("delta")
+    apply.add_argument("-o", "--output", required=True)
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "make":
+            info = make_delta(args.base, args.target, args.output)
+            print(f"✅ Delta: {args.output} (+{len(info['added'])} ~{len(info['changed'])} "
+                  f"-{len(info['removed'])}, {os.path.getsize(args.output)} / {os.path.getsize(args.target)} bytes)")
+        else:
+            apply_delta(args.base, args.delta, args.output)
+            print(f"✅ Bundle direkonstruksi & terverifikasi: {args.output}")
+    except (OSError, ValueError, KeyError) as e:
+        print(f"❌ Gagal: {e}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
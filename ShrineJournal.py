@@ -0,0 +1,170 @@
+import os, sys, json, time, argparse
+
+from BuildCache import BuildCache, CACHE_NAME, file_hash
+from GlyphManifest import GlyphManifest, MANIFEST_PATH
+
+# Write-ahead journal per build cache: setiap modul yang selesai langsung dicatat, sehingga run
+# yang crash bisa dilanjutkan dari entry terakhir yang sudah di-fsync, bukan build ulang penuh.
+
+FSYNC_EVERY = 64 # entry per fsync
+FSYNC_INTERVAL = 1.0 # detik; fsync paling lambat setelah ini walau batch belum penuh
+
+def journal_path_for(cache_path):
+    """.shrine_cache.json -> .shrine_cache.journal (matrix caches keep their tag)."""
+    return os.path.splitext(cache_path)[0] + ".journal"
+
+class BuildJournal:
+    """Append-only JSON-lines log of cache entries written while a run is in progress.
+
+    Entries are flushed on every append and fsynced in batches (every fsync_every entries or
+    fsync_interval seconds), so a crash loses at most one batch. The journal is deleted once
+    the build cache itself has been saved.
+    """
+
+    def __init__(self, path, fsync_every=FSYNC_EVERY, fsync_interval=FSYNC_INTERVAL):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._file = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def append(self, key, entry):
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps({"key": key, "entry": entry}, sort_keys=True) + "\n")
+        self._file.flush()
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self):
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self, remove=False):
+        """Closes the journal; remove=True once its entries are safely in the saved cache."""
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+        if remove and os.path.exists(self.path):
+            os.remove(self.path)
+
+def read_journal(path):
+    """Returns [(key, entry)] from a journal, ignoring a torn last line."""
+    records = []
+    if not os.path.exists(path):
+        return records
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                records.append((record["key"], record["entry"]))
+            except (ValueError, KeyError):
+                break # baris terakhir terpotong saat crash
+    return records
+
+def resume(cache, glyph_folder):
+    """Merges an interrupted run's journal into cache; returns the number of modules recovered.
+
+    Only entries whose glyph still exists and matches the journaled SHA-256 are taken, so
+    a glyph whose data never reached the disk is simply rebuilt.
+    """
+    recovered = 0
+    for key, entry in read_journal(journal_path_for(cache.path)):
+        glyph_path = os.path.join(glyph_folder, entry.get("glyph") or "")
+        try:
+            if entry.get("glyph") and file_hash(glyph_path) == entry.get("glyph_sha256"):
+                cache.entries[key] = entry
+                recovered += 1
+        except OSError:
+            pass
+    return recovered
+
+def _is_partial(name):
+    # Sisa tulis atomik: <glyph>.tmp (place_glyph/MatrixWorker) atau <glyph>.pyc.<id> (py_compile)
+    return name.endswith(".tmp") or (".pyc." in name and not name.endswith(".pyc"))
+
+def check_shrines(folders, output_dir=None, manifest_path=None, fix=False, log=print):
+    """Consistency check of glyph folders against build caches, journals and the manifest.
+
+    A glyph is referenced if a build cache entry, an unfinished journal or a live manifest
+    row points to it. Unreferenced glyphs and leftover temp files are orphans; with fix=True
+    they are deleted and cache entries whose glyph is missing are dropped. Every shrine that
+    shares an output folder must be passed together, or its glyphs look orphaned.
+    Returns a dict of counts.
+    """
+    from ShrineCore import glyph_folder_for
+
+    referenced = {} # glyph folder -> set nama glyph
+    caches = []
+    for folder in folders:
+        # Cache bisa belum ada (run pertama crash): journal saja juga dihitung
+        stems = {os.path.splitext(n)[0] for n in os.listdir(folder)
+                 if n.startswith(".shrine_cache") and n.endswith((".json", ".journal"))}
+        for stem in sorted(stems):
+            name = stem + ".json"
+            tag = stem[len(".shrine_cache."):] if name != CACHE_NAME else ""
+            cloak_folder = os.path.abspath(glyph_folder_for(folder, output_dir, tag))
+            cache = BuildCache(os.path.join(folder, name))
+            names = referenced.setdefault(cloak_folder, set())
+            names.update(entry.get("glyph") for entry in cache.entries.values())
+            names.update(entry.get("glyph") for _, entry in read_journal(journal_path_for(cache.path)))
+            caches.append((cache, cloak_folder))
+
+    unfinished_runs = 0
+    if manifest_path and os.path.exists(manifest_path):
+        with GlyphManifest(manifest_path) as manifest:
+            for row in manifest.current_glyphs():
+                folder = os.path.dirname(row["path"])
+                if folder in referenced:
+                    referenced[folder].add(row["glyph"])
+            unfinished_runs = manifest.conn.execute(
+                "SELECT COUNT(*) FROM runs WHERE finished IS NULL").fetchone()[0]
+
+    counts = {"glyphs": 0, "orphans": 0, "partial": 0, "missing": 0, "unfinished_runs": unfinished_runs}
+    for cloak_folder, names in sorted(referenced.items()):
+        if not os.path.isdir(cloak_folder):
+            continue
+        for name in sorted(os.listdir(cloak_folder)):
+            path = os.path.join(cloak_folder, name)
+            if _is_partial(name):
+                counts["partial"] += 1
+            elif name in names:
+                counts["glyphs"] += 1
+                continue
+            else:
+                counts["orphans"] += 1
+            log(f"🗑️ {'Dihapus' if fix else 'Yatim'}: {path}")
+            if fix:
+                os.remove(path)
+
+    for cache, cloak_folder in caches:
+        missing = [k for k, e in cache.entries.items()
+                   if not os.path.exists(os.path.join(cloak_folder, e.get("glyph") or ""))]
+        counts["missing"] += len(missing)
+        if fix and missing:
+            for key in missing:
+                del cache.entries[key]
+            cache.save()
+    return counts
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check glyph folders for orphans and interrupted runs.")
+    parser.add_argument("folders", nargs="+", help="every shrine folder that shares the output folder")
+    parser.add_argument("-o", "--output", default=None, help="output dir the shrines were compiled with")
+    parser.add_argument("-m", "--manifest", default=MANIFEST_PATH)
+    parser.add_argument("--fix", action="store_true", help="delete orphans and drop cache entries of missing glyphs")
+    args = parser.parse_args(argv)
+
+    counts = check_shrines(args.folders, args.output, args.manifest, fix=args.fix)
+    print(f"🧹 {counts['glyphs']} glyph ok, {counts['orphans']} yatim, {counts['partial']} file sementara, "
+          f"{counts['missing']} entry cache tanpa glyph, {counts['unfinished_runs']} run tidak selesai")
+    dirty = counts["orphans"] or counts["partial"] or counts["missing"]
+    return 1 if dirty and not args.fix else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
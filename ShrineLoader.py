@@ -0,0 +1,69 @@
+import sys, marshal, importlib.abc, importlib.machinery, importlib.util
+from ShrinePak import PakReader
+
+# Import hook runtime: modul dimuat langsung dari .pak (mmap), tanpa ekstrak ke disk
+
+PYC_HEADER_SIZE = 16  # magic + flags + mtime/hash + size
+
+class PakFinder(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+    """sys.meta_path finder serving modules recorded in a bundle's shrine_index.json.
+
+    The index is read once into a dict, so each import is a single O(1) lookup; code
+    objects are unmarshalled straight from the memory-mapped archive.
+    """
+
+    def __init__(self, pak_path):
+        self.pak_path = pak_path
+        self.reader = PakReader(pak_path)
+        index = self.reader.index()
+        if index is None:
+            raise ImportError(f"{pak_path} tidak punya shrine_index.json")
+        self.modules = {}
+        for member, info in index["members"].items():
+            if "module" in info:
+                self.modules[info["module"]] = (member, info.get("package", False))
+
+    def find_spec(self, fullname, path=None, target=None):
+        found = self.modules.get(fullname)
+        if found is None:
+            return None
+        member, is_package = found
+        spec = importlib.machinery.ModuleSpec(fullname, self, origin=f"{self.pak_path}/{member}",
+                                              is_package=is_package)
+        if is_package:
+            # Submodule tetap dicari lewat finder ini, jadi search locations cukup kosong
+            spec.submodule_search_locations = []
+        return spec
+
+    def create_module(self, spec):
+        return None  # pakai pembuatan modul default
+
+    def get_code(self, fullname):
+        member, _ = self.modules[fullname]
+        data = self.reader.read(member)
+        if data[:4] != importlib.util.MAGIC_NUMBER:
+            raise ImportError(f"Glyph {member} dikompilasi untuk interpreter lain", name=fullname)
+        return marshal.loads(memoryview(data)[PYC_HEADER_SIZE:])
+
+    def is_package(self, fullname):
+        return self.modules[fullname][1]
+
+    def get_source(self, fullname):
+        return None
+
+    def exec_module(self, module):
+        exec(self.get_code(module.__spec__.name), module.__dict__)
+
+    def close(self):
+        self.reader.close()
+
+def install(pak_path):
+    """Puts a finder for pak_path at the front of sys.meta_path and returns it."""
+    finder = PakFinder(pak_path)
+    sys.meta_path.insert(0, finder)
+    return finder
+
+def uninstall(finder):
+    if finder in sys.meta_path:
+        sys.meta_path.remove(finder)
+    finder.close()
@@ -0,0 +1,129 @@
+import os, io, re, json, time, pstats, cProfile, threading, tracemalloc, contextlib
+
+# Instrumentasi per run: timer per stage & per file, counter, opsional cProfile/tracemalloc,
+# diekspor ke JSON atau format teks Prometheus setelah run selesai.
+
+SLOWEST_FILES = 20
+
+class Metrics:
+    """Thread-safe timers and counters for one build run.
+
+    stage(name) times a block of the main pipeline (scan, compile, finalize, bundle, ...);
+    add_file(name, timings) records the per-file timings measured inside pool workers
+    (compile, copy, hash, compress). profile=True runs cProfile over the calling thread
+    and trace_memory=True records tracemalloc peaks; both only cover this process, the
+    pool workers report through their per-file timings.
+    """
+
+    def __init__(self, profile=False, trace_memory=False):
+        self.stages = {}
+        self.counters = {}
+        self.files = {}
+        self.started = time.time()
+        self.profile = profile
+        self.trace_memory = trace_memory
+        self.profile_text = None
+        self.memory = None
+        self._profiler = None
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage(name, time.perf_counter() - t0)
+
+    def add_stage(self, name, seconds):
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def add_file(self, name, timings):
+        """Adds {stage: seconds} measured for one file; also sums them per stage under file_<stage>."""
+        with self._lock:
+            entry = self.files.setdefault(name, {})
+            for stage, seconds in timings.items():
+                entry[stage] = entry.get(stage, 0.0) + seconds
+                self.stages["file_" + stage] = self.stages.get("file_" + stage, 0.0) + seconds
+
+    def slowest(self, limit=SLOWEST_FILES):
+        """Returns [(file, total seconds, {stage: seconds})], slowest first."""
+        with self._lock:
+            ranked = sorted(((sum(t.values()), f, dict(t)) for f, t in self.files.items()), reverse=True)
+        return [(f, total, timings) for total, f, timings in ranked[:limit]]
+
+    def start(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self.profile:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def stop(self):
+        if self._profiler is not None:
+            self._profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(self._profiler, stream=out).sort_stats("cumulative").print_stats(30)
+            self.profile_text = out.getvalue()
+            self._profiler = None
+        if self.trace_memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            top = tracemalloc.take_snapshot().statistics("lineno")[:10]
+            self.memory = {"current_bytes": current, "peak_bytes": peak,
+                           "top": [{"where": str(stat.traceback), "bytes": stat.size} for stat in top]}
+            tracemalloc.stop()
+
+    def to_dict(self):
+        with self._lock:
+            stages = {k: round(v, 6) for k, v in sorted(self.stages.items())}
+            counters = dict(sorted(self.counters.items()))
+        return {
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "stages_s": stages,
+            "counters": counters,
+            "slowest_files": [{"file": f, "total_s": round(total, 6),
+                               "stages_s": {k: round(v, 6) for k, v in timings.items()}}
+                              for f, total, timings in self.slowest()],
+            "memory": self.memory,
+            "profile": self.profile_text,
+        }
+
+    def to_prometheus(self):
+        lines = ["# HELP shrine_stage_seconds Wall time spent per pipeline stage in the last run.",
+                 "# TYPE shrine_stage_seconds gauge"]
+        data = self.to_dict()
+        lines += [f'shrine_stage_seconds{{stage="{k}"}} {v}' for k, v in data["stages_s"].items()]
+        for name, value in data["counters"].items():
+            metric = "shrine_" + re.sub(r"[^a-zA-Z0-9_]", "_", name)
+            lines += [f"# TYPE {metric} gauge", f"{metric} {value}"]
+        lines += ["# HELP shrine_file_seconds Time per stage for the slowest files of the last run.",
+                  "# TYPE shrine_file_seconds gauge"]
+        for entry in data["slowest_files"]:
+            label = entry["file"].replace("\\", "\\\\").replace('"', '\\"')
+            lines += [f'shrine_file_seconds{{file="{label}",stage="{k}"}} {v}' for k, v in entry["stages_s"].items()]
+        if data["memory"]:
+            lines += ["# TYPE shrine_peak_memory_bytes gauge", f"shrine_peak_memory_bytes {data['memory']['peak_bytes']}"]
+        return "\n".join(lines) + "\n"
+
+    def export(self, path):
+        """Writes the metrics as Prometheus text when path ends in .prom, otherwise as JSON (atomically)."""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            if path.endswith(".prom"):
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp_path, path)
+
+    def summary(self):
+        """One log line: the main stages and the slowest file."""
+        parts = [f"{k} {v:.2f}s" for k, v in sorted(self.stages.items()) if not k.startswith("file_")]
+        slowest = self.slowest(1)
+        if slowest:
+            parts.append(f"paling lambat: {slowest[0][0]} ({slowest[0][1] * 1000:.0f} ms)")
+        return ", ".join(parts)
@@ -0,0 +1,191 @@
+import os, io, json, mmap, struct, zlib, lzma, hashlib
+
+# Penulis/pembaca .pak (format ZIP) yang deterministik: urutan member tetap, timestamp nol,
+# dan member bisa dikompres di proses lain lalu dirakit tanpa kompres ulang.
+
+INDEX_NAME = "shrine_index.json"
+
+STORED, DEFLATED, LZMA, ZSTD = 0, 8, 14, 93
+DOS_EPOCH = (0, (1 << 5) | 1)  # (time, date) = 1980-01-01 00:00:00, waktu terkecil yang valid di ZIP
+LZMA_DICT_SIZE = 1 << 23
+
+LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+CENTRAL_HEADER = struct.Struct("<4s6H3L5H2L")
+END_RECORD = struct.Struct("<4s4H2LH")
+
+try:
+    from compression import zstd as _zstd  # Python 3.14+
+except ImportError:
+    try:
+        import zstandard as _zstd
+    except ImportError:
+        _zstd = None
+
+def available_codecs():
+    codecs = ["stored", "deflate", "lzma"]
+    if _zstd is not None:
+        codecs.append("zstd")
+    return codecs
+
+def _lzma_filter(level):
+    return {"id": lzma.FILTER_LZMA1, "preset": 6 if level is None else level,
+            "dict_size": LZMA_DICT_SIZE, "lc": 3, "lp": 0, "pb": 2}
+
+def compress_bytes(data, codec="deflate", level=None):
+    """Returns (method, flags, payload) for one member."""
+    if codec == "stored":
+        return STORED, 0, data
+    if codec == "deflate":
+        c = zlib.compressobj(6 if level is None else level, zlib.DEFLATED, -15)
+        return DEFLATED, 0, c.compress(data) + c.flush()
+    if codec == "lzma":
+        # Header LZMA-in-ZIP: versi 9.4, panjang props, lalu props (lc/lp/pb + dict size)
+        props = bytes([(2 * 5 + 0) * 9 + 3]) + struct.pack("<I", LZMA_DICT_SIZE)
+        c = lzma.LZMACompressor(lzma.FORMAT_RAW, filters=[_lzma_filter(level)])
+        return LZMA, 0x02, struct.pack("<BBH", 9, 4, len(props)) + props + c.compress(data) + c.flush()
+    if codec == "zstd":
+        if _zstd is None:
+            raise ValueError("zstd codec tidak tersedia (butuh Python 3.14+ atau paket zstandard)")
+        # compression.zstd dan zstandard sama-sama punya compress(data, level)
+        return ZSTD, 0, _zstd.compress(data, 3 if level is None else level)
+    raise ValueError(f"Codec tidak dikenal: {codec}")
+
+def decompress_bytes(method, payload, size):
+    if method == STORED:
+        return bytes(payload)
+    if method == DEFLATED:
+        return zlib.decompress(payload, -15)
+    if method == LZMA:
+        props_size = struct.unpack_from("<H", payload, 2)[0]
+        props = payload[4:4 + props_size]
+        f = {"id": lzma.FILTER_LZMA1, "dict_size": struct.unpack_from("<I", props, 1)[0],
+             "lc": props[0] % 9, "lp": (props[0] // 9) % 5, "pb": props[0] // 45}
+        return lzma.LZMADecompressor(lzma.FORMAT_RAW, filters=[f]).decompress(payload[4 + props_size:], size)
+    if method == ZSTD and _zstd is not None:
+        return _zstd.decompress(bytes(payload))
+    raise ValueError(f"Metode kompresi {method} tidak didukung")
+
+def make_entry(name, data, codec="deflate", level=None):
+    """Builds a pre-compressed member; safe to run in a worker process."""
+    method, flags, payload = compress_bytes(data, codec, level)
+    if method != STORED and len(payload) >= len(data):
+        # Tidak ada gunanya menyimpan versi terkompres yang lebih besar
+        method, flags, payload = STORED, 0, data
+    return {"name": name, "method": method, "flags": flags, "crc": zlib.crc32(data),
+            "size": len(data), "payload": payload, "sha256": hashlib.sha256(data).hexdigest()}
+
+def write_pak(path, entries):
+    """Writes entries sorted by name with zeroed timestamps; identical inputs give identical bytes."""
+    with PakWriter(path) as writer:
+        for entry in sorted(entries, key=lambda e: e["name"]):
+            writer.add(entry)
+
+class PakWriter:
+    """Streaming writer behind write_pak: members go to disk as they arrive.
+
+    Members must be added in ascending name order (the order write_pak sorts into), so a
+    streamed bundle is byte-identical to one written from the full list at the end.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "wb")
+        self._central = io.BytesIO()
+        self.count = 0
+        self._last_name = None
+
+    def add(self, entry):
+        name = entry["name"].replace(os.sep, "/").encode("utf-8")
+        if self._last_name is not None and name <= self._last_name:
+            raise ValueError(f"Member tidak berurutan atau ganda: {entry['name']}")
+        self._last_name = name
+        f = self._file
+        flags = entry["flags"] | 0x800  # nama UTF-8
+        version = 63 if entry["method"] == LZMA else 20
+        offset = f.tell()
+        if offset > 0xFFFFFFFF or entry["size"] > 0xFFFFFFFF:
+            raise ValueError("Bundle melebihi batas ZIP 4 GiB (ZIP64 belum didukung)")
+        f.write(LOCAL_HEADER.pack(b"PK\x03\x04", version, flags, entry["method"], *DOS_EPOCH,
+                                  entry["crc"], len(entry["payload"]), entry["size"], len(name), 0))
+        f.write(name)
+        f.write(entry["payload"])
+        self._central.write(CENTRAL_HEADER.pack(b"PK\x01\x02", version, version, flags, entry["method"],
+                                                *DOS_EPOCH, entry["crc"], len(entry["payload"]), entry["size"],
+                                                len(name), 0, 0, 0, 0, 0o100644 << 16, offset))
+        self._central.write(name)
+        self.count += 1
+
+    def close(self):
+        """Writes the central directory and closes the file."""
+        if self._file.closed:
+            return
+        central = self._central.getvalue()
+        cd_offset = self._file.tell()
+        self._file.write(central)
+        self._file.write(END_RECORD.pack(b"PK\x05\x06", 0, 0, self.count, self.count, len(central), cd_offset, 0))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class PakReader:
+    """Memory-mapped reader: parses the central directory once, then serves members by name in O(1)."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.entries = self._read_directory()
+
+    def _read_directory(self):
+        mm = self._mm
+        eocd = mm.rfind(b"PK\x05\x06", max(0, len(mm) - 65536 - END_RECORD.size))
+        if eocd < 0:
+            raise ValueError(f"Bukan file .pak yang valid: {self.path}")
+        _, _, _, _, count, cd_size, cd_offset, _ = END_RECORD.unpack_from(mm, eocd)
+        entries = {}
+        pos = cd_offset
+        for _ in range(count):
+            (_, _, _, flags, method, _, _, crc, csize, size,
+             name_len, extra_len, comment_len, _, _, _, offset) = CENTRAL_HEADER.unpack_from(mm, pos)
+            name = mm[pos + CENTRAL_HEADER.size:pos + CENTRAL_HEADER.size + name_len].decode("utf-8")
+            # Offset data dihitung dari local header (panjang nama/extra bisa berbeda dari central)
+            l_name_len, l_extra_len = struct.unpack_from("<2H", mm, offset + 26)
+            data_offset = offset + LOCAL_HEADER.size + l_name_len + l_extra_len
+            entries[name] = {"name": name, "method": method, "flags": flags, "crc": crc,
+                             "size": size, "csize": csize, "data_offset": data_offset}
+            pos += CENTRAL_HEADER.size + name_len + extra_len + comment_len
+        return entries
+
+    def raw(self, name):
+        """Returns the member's compressed payload without decompressing it."""
+        e = self.entries[name]
+        return self._mm[e["data_offset"]:e["data_offset"] + e["csize"]]
+
+    def read(self, name):
+        e = self.entries[name]
+        return decompress_bytes(e["method"], self.raw(name), e["size"])
+
+    def raw_entry(self, name):
+        """Returns an entry dict that write_pak can copy as-is (no recompression)."""
+        e = self.entries[name]
+        return {"name": name, "method": e["method"], "flags": e["flags"] & ~0x800, "crc": e["crc"],
+                "size": e["size"], "payload": self.raw(name)}
+
+    def index(self):
+        if INDEX_NAME not in self.entries:
+            return None
+        return json.loads(self.read(INDEX_NAME))
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,163 @@
+import os, sys, time, struct, select, ctypes, ctypes.util
+
+from BuildCache import SKIP_DIRS, iter_sources
+
+# Watch mode: inotify (Linux) lewat ctypes, fallback polling mtime di platform lain
+
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct("iIII")
+
+def _load_inotify():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+class ShrineWatcher:
+    """Watches shrine folders and calls on_changes({folder: {source paths}}) after each debounced burst.
+
+    on_changes also receives the monotonic time of the first event in the burst so the caller
+    can report edit-to-glyph latency. run() blocks until stop() is called from another thread.
+    """
+
+    def __init__(self, folders, on_changes, debounce=0.15, poll_interval=0.5, force_polling=False):
+        self.folders = [os.path.abspath(f) for f in folders]
+        self.on_changes = on_changes
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self._running = False
+        self._libc = None if force_polling else _load_inotify()
+        self.backend = "inotify" if self._libc else "polling"
+
+    def stop(self):
+        self._running = False
+
+    def _owner(self, path):
+        for folder in self.folders:
+            if path == folder or path.startswith(folder + os.sep):
+                return folder
+        return None
+
+    @staticmethod
+    def _relevant(path):
+        parts = path.split(os.sep)
+        return path.endswith(".py") and not any(p in SKIP_DIRS for p in parts)
+
+    def run(self):
+        self._running = True
+        if self._libc:
+            self._run_inotify()
+        else:
+            self._run_polling()
+
+    def _flush(self, pending, first_event):
+        if pending:
+            batch = {}
+            for path in pending:
+                folder = self._owner(path)
+                if folder:
+                    batch.setdefault(folder, set()).add(path)
+            if batch:
+                self.on_changes(batch, first_event)
+        return set(), None
+
+    # === inotify ===
+    def _run_inotify(self):
+        libc = self._libc
+        fd = libc.inotify_init1(os.O_NONBLOCK | getattr(os, "O_CLOEXEC", 0))
+        if fd < 0:
+            self.backend = "polling"
+            self._run_polling()
+            return
+        watches = {}
+
+        def add_tree(root, pending=None):
+            for dirpath, dirs, files in os.walk(root):
+                dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+                wd = libc.inotify_add_watch(fd, os.fsencode(dirpath), WATCH_MASK)
+                if wd >= 0:
+                    watches[wd] = dirpath
+                if pending is not None:
+                    # Folder baru/dipindah masuk: file di dalamnya tidak memicu event sendiri
+                    pending.update(os.path.join(dirpath, f) for f in files if f.endswith(".py"))
+
+        try:
+            for folder in self.folders:
+                add_tree(folder)
+            pending, first_event = set(), None
+            while self._running:
+                timeout = self.debounce if pending else self.poll_interval
+                ready, _, _ = select.select([fd], [], [], timeout)
+                if not ready:
+                    pending, first_event = self._flush(pending, first_event)
+                    continue
+                try:
+                    data = os.read(fd, 64 * 1024)
+                except BlockingIOError:
+                    continue
+                offset = 0
+                while offset < len(data):
+                    wd, mask, _, name_len = EVENT_HEADER.unpack_from(data, offset)
+                    raw_name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + name_len]
+                    offset += EVENT_HEADER.size + name_len
+                    if mask & IN_IGNORED:
+                        watches.pop(wd, None)
+                        continue
+                    directory = watches.get(wd)
+                    if directory is None:
+                        continue
+                    path = os.path.join(directory, os.fsdecode(raw_name.rstrip(b"\0")))
+                    if mask & IN_ISDIR:
+                        if os.path.basename(path) in SKIP_DIRS:
+                            continue
+                        if mask & (IN_CREATE | IN_MOVED_TO):
+                            add_tree(path, pending)
+                        elif mask & (IN_DELETE | IN_MOVED_FROM):
+                            pending.add(path) # ShrineBuild menghapus semua modul di bawah folder ini
+                        first_event = first_event or time.monotonic()
+                        continue
+                    if self._relevant(path):
+                        pending.add(path)
+                        first_event = first_event or time.monotonic()
+        finally:
+            os.close(fd)
+
+    # === polling fallback ===
+    def _snapshot(self):
+        state = {}
+        for folder in self.folders:
+            for path in iter_sources(folder):
+                try:
+                    st = os.stat(path)
+                    state[path] = (st.st_mtime_ns, st.st_size)
+                except OSError:
+                    pass
+        return state
+
+    def _run_polling(self):
+        previous = self._snapshot()
+        pending, first_event = set(), None
+        while self._running:
+            time.sleep(self.debounce if pending else self.poll_interval)
+            current = self._snapshot()
+            changed = {p for p, s in current.items() if previous.get(p) != s}
+            changed |= previous.keys() - current.keys()
+            previous = current
+            if changed:
+                pending |= changed
+                first_event = first_event or time.monotonic()
+            else:
+                pending, first_event = self._flush(pending, first_event)
@@ -0,0 +1,214 @@
+import sys, os, time, argparse, subprocess
+
+from ShrineCore import ShrineBuild, glyph_folder_for
+from GlyphManifest import MANIFEST_PATH
+from GlyphNames import config_salt
+from ParallelCompiler import GLYPH_MODES
+from ShrinePak import available_codecs
+from ShrineMetrics import Metrics
+
+# Entry point headless: tidak mengimpor PyQt6 sama sekali, cocok untuk build agent CI
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="shrine-compile",
+        description="Compile and glyphify Python shrine folders without the GUI.")
+    parser.add_argument("folders", nargs="+", help="shrine folders to compile")
+    parser.add_argument("-j", "--jobs", type=int, default=0,
+                        help="worker processes (default: 0 = one per CPU core)")
+    parser.add_argument("-o", "--output", default=None,
+                        help="write glyphs to OUTPUT/.glyphs instead of <folder>/.glyphs")
+    parser.add_argument("-m", "--manifest", default=os.path.join(os.getcwd(), MANIFEST_PATH),
+                        help=f"manifest path (default: ./{MANIFEST_PATH})")
+    parser.add_argument("--glyph-mode", choices=GLYPH_MODES, default="direct",
+                        help="direct: compile straight into .glyphs; link: hardlink/reflink from __pycache__; "
+                             "copy: copy from __pycache__ (default: direct)")
+    parser.add_argument("--salt", default=os.environ.get("SHRINE_GLYPH_SALT"),
+                        help="key for deterministic glyph names (default: $SHRINE_GLYPH_SALT, "
+                             "else glyph_salt from the GUI's compiler_config.json)")
+    parser.add_argument("--python", action="append", dest="interpreters", metavar="PATH",
+                        help="build matrix: also compile for this interpreter (repeatable; "
+                             "the running interpreter is only included when listed)")
+    parser.add_argument("-O", "--optimize", default=None, metavar="LEVELS",
+                        help="build matrix: comma-separated optimization levels, e.g. 0,1,2")
+    parser.add_argument("--bundle", metavar="DIR", default=None,
+                        help="pipelined mode: stream glyphs into a deterministic .pak in DIR while compiling")
+    parser.add_argument("--codec", default="deflate", choices=available_codecs(),
+                        help="bundle codec for --bundle (default: deflate)")
+    parser.add_argument("--level", type=int, default=None, help="bundle compression level for --bundle")
+    parser.add_argument("--affected", action="append", metavar="FILE", default=None,
+                        help="rebuild and validate only FILE and the modules that import it, "
+                             "using the import graph from the last build (repeatable)")
+    parser.add_argument("--artifact-cache", metavar="DIR_OR_URL", default=os.environ.get("SHRINE_ARTIFACT_CACHE"),
+                        help="shared artifact cache: a folder or http://host:port of `ArtifactCache.py serve` "
+                             "(default: $SHRINE_ARTIFACT_CACHE)")
+    parser.add_argument("--artifact-cache-size", default="1G", metavar="SIZE",
+                        help="LRU size bound of a folder artifact cache, e.g. 512M (default: 1G)")
+    parser.add_argument("--gc", action="store_true",
+                        help="after the build, delete orphaned glyphs and leftover temp files "
+                             "(pass every shrine that shares the output folder)")
+    parser.add_argument("--metrics", action="append", metavar="FILE", default=None,
+                        help="after each run, write stage/file timings and counters to FILE "
+                             "(Prometheus text when FILE ends in .prom, JSON otherwise; repeatable)")
+    parser.add_argument("--profile", action="store_true",
+                        help="run cProfile over the main process and include the report in the metrics")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="track peak memory with tracemalloc and include it in the metrics")
+    parser.add_argument("-w", "--watch", action="store_true",
+                        help="after the initial build, recompile modules as they change")
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="only print errors and the final summary")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    missing = [f for f in args.folders if not os.path.isdir(f)]
+    if missing:
+        print(f"⛔ Folder tidak ditemukan: {', '.join(missing)}", file=sys.stderr)
+        return 2
+    if args.salt is None:
+        args.salt = config_salt()
+    if not args.salt:
+        print("⚠️ Salt glyph kosong: nama glyph hanya hash path modul yang bisa dihitung siapa saja. "
+              "Isi --salt, $SHRINE_GLYPH_SALT atau glyph_salt di compiler_config.json.", file=sys.stderr)
+
+    def log(message):
+        if not args.quiet or message.startswith(("❌", "♻️", "🧘")):
+            print(message, flush=True)
+
+    def detail(message):
+        if not args.quiet:
+            print(message, flush=True)
+
+    targets = None
+    if args.interpreters or args.optimize:
+        if args.watch or args.bundle or args.affected:
+            print("⛔ --watch, --bundle dan --affected belum mendukung build matrix", file=sys.stderr)
+            return 2
+        from BuildMatrix import resolve_targets
+        try:
+            levels = [int(level) for level in (args.optimize or "0").split(",") if level.strip()]
+            targets = resolve_targets(args.interpreters, levels)
+        except (ValueError, OSError, subprocess.SubprocessError) as e:
+            print(f"⛔ Target build matrix tidak valid: {e}", file=sys.stderr)
+            return 2
+
+    artifact_size = None
+    if args.artifact_cache:
+        from ArtifactCache import parse_size
+        try:
+            artifact_size = parse_size(args.artifact_cache_size)
+        except ValueError as e:
+            print(f"⛔ --artifact-cache-size: {e}", file=sys.stderr)
+            return 2
+        if targets:
+            print("⚠️ Artifact cache belum mendukung build matrix, diabaikan.", file=sys.stderr)
+
+    def make_build(folders):
+        metrics = Metrics(profile=args.profile, trace_memory=args.trace_memory)
+        artifact_cache = None
+        if args.artifact_cache and not targets:
+            from ArtifactCache import open_artifact_cache
+            artifact_cache = open_artifact_cache(args.artifact_cache, artifact_size)
+        if targets:
+            from BuildMatrix import MatrixBuild
+            return MatrixBuild(folders, args.manifest, targets, jobs=args.jobs, output_dir=args.output,
+                               log=log, detail=detail, glyph_salt=args.salt, metrics=metrics)
+        return ShrineBuild(folders, args.manifest, jobs=args.jobs, output_dir=args.output,
+                           log=log, detail=detail, glyph_mode=args.glyph_mode, glyph_salt=args.salt,
+                           bundle_dir=args.bundle, bundle_codec=args.codec, bundle_level=args.level,
+                           metrics=metrics, artifact_cache=artifact_cache)
+
+    build = make_build(args.folders)
+    if args.affected:
+        return rebuild_affected(args, build, log)
+    try:
+        outputs = build.run()
+    except KeyboardInterrupt:
+        build.cancel()
+        print("Kompilasi dibatalkan.", file=sys.stderr)
+        return 130
+    finally:
+        report_metrics(args, build, log)
+
+    for folder in outputs:
+        print(f"📂 {folder}")
+    if build.bundle_path:
+        print(f"📦 {build.bundle_path}")
+    if build.cancelled:
+        return 130
+    if args.gc:
+        from ShrineJournal import check_shrines
+        counts = check_shrines(args.folders, args.output, args.manifest, fix=True, log=detail)
+        log(f"🧹 GC: {counts['orphans']} glyph yatim, {counts['partial']} file sementara dihapus")
+    if args.watch:
+        return watch(args, make_build)
+    return 1 if build.errors else 0
+
+def rebuild_affected(args, build, log):
+    from ImportGraph import affected_changes
+    from GlyphValidator import validate_glyphs
+
+    changed = affected_changes(args.manifest, args.folders, args.affected)
+    sources = [path for paths in changed.values() for path in paths]
+    print(f"🎯 {len(sources)} modul terdampak oleh {len(args.affected)} file", flush=True)
+    for path in sources:
+        log(f"   {path}")
+    if not sources:
+        return 0
+    try:
+        build.run(changed=changed, force=True)
+    except KeyboardInterrupt:
+        build.cancel()
+        print("Kompilasi dibatalkan.", file=sys.stderr)
+        report_metrics(args, build, log)
+        return 130
+    if build.cancelled:
+        report_metrics(args, build, log)
+        return 130
+    by_glyph_folder = {}
+    for folder, paths in changed.items():
+        by_glyph_folder.setdefault(glyph_folder_for(folder, args.output), []).extend(paths)
+    ok = True
+    with build.metrics.stage("validate"):
+        for glyph_folder, paths in by_glyph_folder.items():
+            ok = validate_glyphs(args.manifest, glyph_folder, full=True, sources=paths) and ok
+    report_metrics(args, build, log)
+    return 0 if ok and not build.errors else 1
+
+def report_metrics(args, build, log):
+    """Logs the stage summary and writes every --metrics file; the profile goes to stdout without one."""
+    metrics = build.metrics
+    log(f"⏱️ {metrics.summary()}")
+    for path in args.metrics or ():
+        try:
+            metrics.export(path)
+        except OSError as e:
+            log(f"❌ Metrics gagal ditulis ke {path}: {e}")
+    if metrics.profile_text and not args.metrics:
+        print(metrics.profile_text, flush=True)
+
+def watch(args, make_build):
+    from ShrineWatcher import ShrineWatcher
+
+    def on_changes(batch, first_event):
+        started = time.monotonic()
+        build = make_build(list(batch))
+        build.run(changed=batch)
+        done = time.monotonic()
+        report_metrics(args, build, lambda message: None)
+        count = sum(len(paths) for paths in batch.values())
+        print(f"⚡ {count} perubahan: compile {(done - started) * 1000:.0f} ms, "
+              f"edit→glyph {(done - first_event) * 1000:.0f} ms", flush=True)
+
+    watcher = ShrineWatcher(args.folders, on_changes)
+    print(f"👁️ Watching {len(args.folders)} shrine(s) via {watcher.backend} — Ctrl+C untuk berhenti", flush=True)
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        watcher.stop()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,20 +1,29 @@
 import sys
 import os
-import compileall
-import shutil
-import random
-import string
+import multiprocessing
 import json
+import time
+import secrets
 from datetime import datetime
 
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QPushButton, QVBoxLayout,
     QFileDialog, QTextEdit, QLabel, QListWidget, QMessageBox,
-    QHBoxLayout, QComboBox, QCheckBox # Import QCheckBox
+    QHBoxLayout, QComboBox, QCheckBox, QProgressBar,
+    QTableWidget, QTableWidgetItem, QHeaderView
 )
 from PyQt6.QtCore import Qt, QUrl, QObject, QThread, pyqtSignal # Import QObject, QThread, pyqtSignal for multithreading
 from PyQt6.QtGui import QIcon, QDesktopServices # Import QDesktopServices for opening folders
 
+from ShrineCore import ShrineBuild
+from ShrineMetrics import Metrics
+from ArtifactCache import open_artifact_cache, parse_size
+from BuildMatrix import MatrixBuild, resolve_targets
+from LogPipeline import LogPipeline
+from ShrineWatcher import ShrineWatcher
+from GlyphManifest import MANIFEST_PATH
+from GlyphNames import COMPILER_CONFIG_PATH
+
 # Pastikan file GlyphWidget.py ada di direktori yang sama
 # Jika GlyphWidget belum memiliki stop_loop(), tambahkan secara manual.
 # from GlyphWidget import GlyphWidget 
@@ -41,7 +50,6 @@ class GlyphWidget(QWidget):
 
 # === Config & Language Paths ===
 BASE_PATH = os.path.dirname(os.path.abspath(__file__))
-COMPILER_CONFIG_PATH = os.path.join(BASE_PATH, "compiler_config.json")
 LANG_DIR = BASE_PATH # Language files are in the same directory as the script
 
 def load_compiler_config(path):
@@ -49,7 +57,18 @@ def load_compiler_config(path):
     if not os.path.exists(path):
         default_config = { 
             "language": "en", 
-            "open_folder_after_convert": True 
+            "open_folder_after_convert": True,
+            "jobs": 0, # 0 = satu worker per core
+            "log_max_lines": 5000,
+            "show_log_details": True,
+            "glyph_mode": "direct", # direct | link | copy
+            "glyph_salt": secrets.token_hex(16), # kunci nama glyph deterministik
+            "matrix_interpreters": [], # build matrix: path interpreter lain
+            "matrix_optimize": [], # build matrix: level optimize, mis. [0, 1, 2]
+            "metrics_path": "", # .json / .prom: metrics ditulis setelah setiap run
+            "metrics_profile": False, # cProfile thread kompilasi, hasilnya ikut di metrics
+            "artifact_cache": "", # folder atau http://host:port cache artefak bersama
+            "artifact_cache_size": "1G" # batas LRU untuk cache artefak berbentuk folder
         } 
         with open(path, "w", encoding="utf-8") as f:
             json.dump(default_config, f, indent=2)
@@ -59,6 +78,20 @@ def load_compiler_config(path):
         # Ensure new keys exist if loading an old config
         if "open_folder_after_convert" not in config:
             config["open_folder_after_convert"] = True
+        if "jobs" not in config:
+            config["jobs"] = 0
+        config.setdefault("log_max_lines", 5000)
+        config.setdefault("show_log_details", True)
+        config.setdefault("glyph_mode", "direct")
+        config.setdefault("matrix_interpreters", [])
+        config.setdefault("matrix_optimize", [])
+        config.setdefault("metrics_path", "")
+        config.setdefault("metrics_profile", False)
+        config.setdefault("artifact_cache", "")
+        config.setdefault("artifact_cache_size", "1G")
+        if "glyph_salt" not in config:
+            config["glyph_salt"] = secrets.token_hex(16)
+            save_compiler_config(config, path)
         return config
 
 def save_compiler_config(config_data, path):
@@ -68,81 +101,79 @@ def save_compiler_config(config_data, path):
 
 # === Worker Thread for Compilation ===
 class CompilerWorker(QObject):
-    finished = pyqtSignal(list) # Emits list of successful output folders
+    finished = pyqtSignal(list, bool) # Emits list of successful output folders and whether the run was cancelled
     error = pyqtSignal(str) # Emits error messages
-    log_message = pyqtSignal(str) # Emits log messages to be displayed in UI
+    stats = pyqtSignal(object) # Emits the run's Metrics before finished
     
-    def __init__(self, folders, manifest_path):
+    def __init__(self, folders, manifest_path, log_pipeline, jobs=0, glyph_mode="direct", glyph_salt="",
+                 targets=None, metrics_path="", profile=False, artifact_cache=None):
         super().__init__()
-        self.folders = folders
-        self.manifest_path = manifest_path
-        self._is_running = True
-
-    def random_name(self, length=6):
-        return "gy_" + ''.join(random.choices(string.ascii_lowercase + string.digits, k=length)) + ".pyc"
+        # Semua logika kompilasi ada di ShrineCore; log & progress masuk buffer LogPipeline,
+        # bukan satu signal lintas thread per glyph
+        self.log_pipeline = log_pipeline
+        self.metrics_path = metrics_path
+        metrics = Metrics(profile=profile)
+        if targets:
+            self.build = MatrixBuild(folders, manifest_path, targets, jobs=jobs,
+                                     log=log_pipeline.summary, detail=log_pipeline.detail,
+                                     progress=log_pipeline.set_progress, glyph_salt=glyph_salt,
+                                     metrics=metrics)
+        else:
+            self.build = ShrineBuild(folders, manifest_path, jobs=jobs,
+                                     log=log_pipeline.summary, detail=log_pipeline.detail,
+                                     progress=log_pipeline.set_progress, glyph_mode=glyph_mode,
+                                     glyph_salt=glyph_salt, metrics=metrics, artifact_cache=artifact_cache)
 
     def stop(self):
-        self._is_running = False
+        # Dipanggil langsung dari UI thread; build menghentikan worker process yang sedang jalan
+        self.build.cancel()
 
     def run_compilation(self):
-        successful_output_folders = []
         try:
-            with open(self.manifest_path, "a", encoding="utf-8") as manifest:
-                manifest.write(f"\n=== [{datetime.now()}] ===\n")
-
-                for folder in self.folders:
-                    if not self._is_running: # Allow stopping the process
-                        self.log_message.emit("Kompilasi dibatalkan.")
-                        break
-
-                    self.log_message.emit(f"📦 Shrine: {folder}")
-                    
-                    try:
-                        compileall.compile_dir(folder, force=True, legacy=True, quiet=1)
-                    except Exception as e:
-                        self.log_message.emit(f"❌ Error compiling {folder}: {e}")
-                        continue # Skip to next folder if compilation fails
-
-                    pycache_path = os.path.join(folder, "__pycache__")
-                    cloak_folder = os.path.join(folder, ".glyphs")
-                    os.makedirs(cloak_folder, exist_ok=True)
-                    
-                    # Ensure pycache_path exists before walking
-                    if not os.path.exists(pycache_path):
-                        self.log_message.emit(f"⚠️ Warning: No __pycache__ found for {folder}. Skipping glyphification.")
-                        continue
-
-                    files_found = False
-                    for root, _, files in os.walk(pycache_path):
-                        for file in files:
-                            if file.endswith(".pyc"):
-                                files_found = True
-                                original_path = os.path.join(root, file)
-                                glyph_name = self.random_name()
-                                renamed_path = os.path.join(cloak_folder, glyph_name)
-
-                                try:
-                                    shutil.copy2(original_path, renamed_path)
-                                    self.log_message.emit(f"✅ Glyphified: {glyph_name}")
-                                    manifest.write(f"{renamed_path}\n")
-                                except FileNotFoundError:
-                                    self.log_message.emit(f"❌ Error: Source file not found - {original_path}")
-                                except PermissionError:
-                                    self.log_message.emit(f"❌ Error: Permission denied for {original_path} or {renamed_path}")
-                                except Exception as e:
-                                    self.log_message.emit(f"❌ General Error glyphifying {file}: {e}")
-                    
-                    if files_found:
-                        successful_output_folders.append(cloak_folder)
-                    else:
-                        self.log_message.emit(f"⚠️ No .pyc files found in {pycache_path} for glyphification.")
-
-            self.log_message.emit("🧘‍♂️ Ritual selesai. Semua glyph disimpan.")
-            self.finished.emit(successful_output_folders)
-
+            successful_output_folders = self.build.run()
+            if self.metrics_path:
+                try:
+                    self.build.metrics.export(self.metrics_path)
+                except OSError as e:
+                    self.log_pipeline.summary(f"❌ Metrics gagal ditulis ke {self.metrics_path}: {e}")
+            self.stats.emit(self.build.metrics)
+            self.finished.emit(successful_output_folders, self.build.cancelled)
         except Exception as e:
             self.error.emit(f"Terjadi kesalahan fatal selama kompilasi: {e}")
-            self.finished.emit([]) # Emit finished with empty list on fatal error
+            self.finished.emit([], False) # Emit finished with empty list on fatal error
+
+# === Worker Thread for Watch Mode ===
+class WatchWorker(QObject):
+    stopped = pyqtSignal()
+
+    def __init__(self, folders, manifest_path, log_pipeline, **build_options):
+        super().__init__()
+        self.manifest_path = manifest_path
+        self.log_pipeline = log_pipeline
+        self.build_options = build_options
+        self.watcher = ShrineWatcher(folders, self.on_changes)
+
+    def on_changes(self, batch, first_event):
+        # Hanya modul yang tersentuh yang dikompilasi ulang; manifest & .glyphs diperbarui di tempat
+        started = time.monotonic()
+        build = ShrineBuild(list(batch), self.manifest_path, log=self.log_pipeline.summary,
+                            detail=self.log_pipeline.detail, **self.build_options)
+        try:
+            build.run(changed=batch)
+        except Exception as e:
+            self.log_pipeline.summary(f"❌ Watch error: {e}")
+            return
+        done = time.monotonic()
+        count = sum(len(paths) for paths in batch.values())
+        self.log_pipeline.summary(f"⚡ {count} change(s): compile {(done - started) * 1000:.0f} ms, "
+                                  f"edit→glyph {(done - first_event) * 1000:.0f} ms")
+
+    def run_watch(self):
+        self.watcher.run()
+        self.stopped.emit()
+
+    def stop(self):
+        self.watcher.stop()
 
 class ShrineCompiler(QWidget):
     def __init__(self):
@@ -167,11 +198,15 @@ class ShrineCompiler(QWidget):
         self.folder_list = QListWidget()
         self.log_area = QTextEdit()
         self.log_area.setReadOnly(True)
-        self.manifest_path = os.path.join(os.getcwd(), "manifest_glyph.txt")
+        self.log_pipeline = LogPipeline(self.log_area, max_lines=self.config.get("log_max_lines", 5000), parent=self)
+        self.log_pipeline.show_details = self.config.get("show_log_details", True)
+        self.manifest_path = os.path.join(os.getcwd(), MANIFEST_PATH)
 
         # Worker thread for compilation
         self.thread = None
         self.worker = None
+        self.watch_thread = None
+        self.watch_worker = None
 
         self.setup_ui()
 
@@ -179,6 +214,8 @@ class ShrineCompiler(QWidget):
         self.btn_add.clicked.connect(self.add_folder)
         self.btn_clear.clicked.connect(self.clear_all)
         self.btn_convert.clicked.connect(self.start_compilation)
+        self.btn_cancel.clicked.connect(self.cancel_compilation)
+        self.btn_watch.toggled.connect(self.toggle_watch)
 
     def _load_language_data(self, lang_code):
         """Loads translations from a JSON file."""
@@ -242,10 +279,38 @@ class ShrineCompiler(QWidget):
 
         main_layout.addWidget(self.btn_convert)
 
+        self.btn_cancel = QPushButton(self.tr("cancel_button"))
+        self.btn_cancel.setEnabled(False)
+        main_layout.addWidget(self.btn_cancel)
+
+        self.btn_watch = QPushButton(self.tr("watch_button"))
+        self.btn_watch.setCheckable(True)
+        main_layout.addWidget(self.btn_watch)
+
         self.log_manifest_label = QLabel(self.tr("log_manifest_label")) # Make QLabel an attribute
         main_layout.addWidget(self.log_manifest_label)
         main_layout.addWidget(self.log_area)
 
+        self.checkbox_log_details = QCheckBox(self.tr("log_details_checkbox"))
+        self.checkbox_log_details.setChecked(self.log_pipeline.show_details)
+        self.checkbox_log_details.stateChanged.connect(self._toggle_log_details)
+        main_layout.addWidget(self.checkbox_log_details)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setValue(0)
+        self.log_pipeline.progress.connect(self.update_progress)
+        main_layout.addWidget(self.progress_bar)
+
+        # Panel statistik: stage & file paling lambat dari run terakhir (ShrineMetrics)
+        self.stats_label = QLabel(self.tr("stats_label"))
+        main_layout.addWidget(self.stats_label)
+        self.stats_table = QTableWidget(0, 3)
+        self.stats_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.stats_table.verticalHeader().setVisible(False)
+        self.stats_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.stats_table.setMaximumHeight(180)
+        main_layout.addWidget(self.stats_table)
+
         self.glyph_animator = GlyphWidget() 
         # main_layout.addWidget(self.glyph_animator) # Uncomment if GlyphWidget is part of layout
 
@@ -259,9 +324,15 @@ class ShrineCompiler(QWidget):
         self.btn_add.setText(self.tr("add_folder_button"))
         self.btn_convert.setText(self.tr("convert_button"))
         self.btn_clear.setText(self.tr("clear_list_button"))
+        self.btn_cancel.setText(self.tr("cancel_button"))
+        self.btn_watch.setText(self.tr("watch_button"))
         self.checkbox_open_folder.setText(self.tr("open_folder_checkbox"))
+        self.checkbox_log_details.setText(self.tr("log_details_checkbox"))
         self.folder_list_label.setText(self.tr("folder_list_label")) # Direct update
         self.log_manifest_label.setText(self.tr("log_manifest_label")) # Direct update
+        self.stats_label.setText(self.tr("stats_label"))
+        self.stats_table.setHorizontalHeaderLabels(
+            [self.tr("stats_column_item"), self.tr("stats_column_time"), self.tr("stats_column_detail")])
 
     def change_language(self, index):
         """Handles language change from the QComboBox."""
@@ -275,6 +346,17 @@ class ShrineCompiler(QWidget):
         self.config["open_folder_after_convert"] = self.checkbox_open_folder.isChecked()
         save_compiler_config(self.config, COMPILER_CONFIG_PATH)
 
+    def _toggle_log_details(self, state):
+        """Switches between per-glyph and summary-only log output."""
+        self.log_pipeline.set_show_details(self.checkbox_log_details.isChecked())
+        self.config["show_log_details"] = self.checkbox_log_details.isChecked()
+        save_compiler_config(self.config, COMPILER_CONFIG_PATH)
+
+    def update_progress(self, done, total, nbytes):
+        self.progress_bar.setMaximum(max(total, 1))
+        self.progress_bar.setValue(done)
+        self.progress_bar.setFormat(f"%v/%m ({nbytes / (1024 * 1024):.1f} MB)")
+
     def add_folder(self):
         folder = QFileDialog.getExistingDirectory(self, self.tr("select_folder_dialog_title"))
         if folder and folder not in [self.folder_list.item(i).text() for i in range(self.folder_list.count())]:
@@ -282,16 +364,81 @@ class ShrineCompiler(QWidget):
 
     def clear_all(self):
         self.folder_list.clear()
-        self.log_area.clear()
+        self.log_pipeline.clear()
 
     def log(self, message):
-        self.log_area.append(message)
+        self.log_pipeline.summary(message)
+        self.log_pipeline.flush()
+
+    def _build_options(self):
+        return {
+            "jobs": self.config.get("jobs", 0),
+            "glyph_mode": self.config.get("glyph_mode", "direct"),
+            "glyph_salt": self.config.get("glyph_salt", ""),
+        }
+
+    def toggle_watch(self, enabled):
+        if not enabled:
+            if self.watch_worker:
+                self.watch_worker.stop() # Loop watcher berhenti dalam satu poll interval
+            return
+
+        folders = [self.folder_list.item(i).text() for i in range(self.folder_list.count())]
+        if not folders:
+            self.btn_watch.setChecked(False)
+            QMessageBox.warning(self, self.tr("empty_folders_warning_title"), self.tr("empty_folders_warning_message"))
+            return
+        if self.config.get("matrix_interpreters") or self.config.get("matrix_optimize"):
+            # Watch hanya membangun .glyphs biasa; sama dengan CLI yang menolak --watch + matrix
+            self.btn_watch.setChecked(False)
+            QMessageBox.warning(self, self.tr("watch_button"), self.tr("watch_matrix_warning_message"))
+            return
+
+        for widget in (self.btn_add, self.btn_clear, self.btn_convert, self.lang_combo):
+            widget.setEnabled(False)
+
+        self.watch_thread = QThread()
+        self.watch_worker = WatchWorker(folders, self.manifest_path, self.log_pipeline, **self._build_options())
+        self.watch_worker.moveToThread(self.watch_thread)
+        self.watch_thread.started.connect(self.watch_worker.run_watch)
+        self.watch_worker.stopped.connect(self.on_watch_stopped)
+        self.watch_worker.stopped.connect(self.watch_thread.quit)
+        self.watch_worker.stopped.connect(self.watch_worker.deleteLater)
+        self.watch_thread.finished.connect(self.watch_thread.deleteLater)
+
+        self.log(f"{self.tr('watch_started_log')} ({self.watch_worker.watcher.backend})")
+        self.log_pipeline.start()
+        self.watch_thread.start()
+
+    def on_watch_stopped(self):
+        self.log_pipeline.stop()
+        self.log(self.tr("watch_stopped_log"))
+        self.watch_worker = None
+        for widget in (self.btn_add, self.btn_clear, self.btn_convert, self.lang_combo):
+            widget.setEnabled(True)
 
     def start_compilation(self):
         folders = [self.folder_list.item(i).text() for i in range(self.folder_list.count())]
         if not folders:
             QMessageBox.warning(self, self.tr("empty_folders_warning_title"), self.tr("empty_folders_warning_message"))
             return
+
+        targets = None
+        if self.config.get("matrix_interpreters") or self.config.get("matrix_optimize"):
+            try:
+                targets = resolve_targets(self.config.get("matrix_interpreters"), self.config.get("matrix_optimize"))
+            except Exception as e:
+                QMessageBox.critical(self, "Error Kompilasi", f"Build matrix: {e}")
+                return
+
+        artifact_cache = None
+        if self.config.get("artifact_cache"):
+            try:
+                artifact_cache = open_artifact_cache(self.config["artifact_cache"],
+                                                     parse_size(self.config.get("artifact_cache_size", "1G")))
+            except (OSError, ValueError) as e:
+                QMessageBox.critical(self, "Error Kompilasi", f"Artifact cache: {e}")
+                return
         
         # Disable buttons during compilation
         self.btn_add.setEnabled(False)
@@ -299,31 +446,60 @@ class ShrineCompiler(QWidget):
         self.btn_convert.setEnabled(False)
         self.lang_combo.setEnabled(False)
         self.checkbox_open_folder.setEnabled(False)
+        self.btn_cancel.setEnabled(True)
+        self.btn_watch.setEnabled(False)
 
-        self.log_area.clear() # Clear log before new compilation
+        self.log_pipeline.clear() # Clear log before new compilation
+        self.progress_bar.setValue(0)
         self.log(f"{self.tr('compilation_start_log')} {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         
         self.glyph_animator.start_loop() # Start animation
 
         # Setup worker thread
         self.thread = QThread()
-        self.worker = CompilerWorker(folders, self.manifest_path)
+        self.worker = CompilerWorker(folders, self.manifest_path, self.log_pipeline, targets=targets,
+                                     metrics_path=self.config.get("metrics_path"),
+                                     profile=self.config.get("metrics_profile", False),
+                                     artifact_cache=artifact_cache,
+                                     **self._build_options())
         self.worker.moveToThread(self.thread)
 
         # Connect signals
         self.thread.started.connect(self.worker.run_compilation)
+        self.worker.stats.connect(self.show_stats)
         self.worker.finished.connect(self.on_compilation_finished)
         self.worker.error.connect(self.on_compilation_error)
-        self.worker.log_message.connect(self.log)
         self.thread.finished.connect(self.thread.deleteLater)
         self.worker.finished.connect(self.worker.deleteLater)
         self.worker.error.connect(self.worker.deleteLater) # Also delete worker on error completion
 
         # Start the thread
+        self.log_pipeline.start()
         self.thread.start()
 
-    def on_compilation_finished(self, output_folders):
+    def cancel_compilation(self):
+        if self.worker:
+            self.btn_cancel.setEnabled(False)
+            self.log(self.tr("cancel_requested_log"))
+            self.worker.stop() # Langsung, karena worker thread sedang sibuk menjalankan kompilasi
+
+    def show_stats(self, metrics):
+        """Fills the stats panel: pipeline stages first, then the slowest files of the run."""
+        rows = [(name, seconds, "") for name, seconds in sorted(metrics.stages.items(), key=lambda s: -s[1])]
+        rows += [("", None, "")]
+        rows += [(path, total, ", ".join(f"{stage} {s * 1000:.1f}" for stage, s in timings.items()))
+                 for path, total, timings in metrics.slowest(10)]
+        counters = ", ".join(f"{name}={value}" for name, value in sorted(metrics.counters.items()))
+        rows.append(("", None, counters))
+        self.stats_table.setRowCount(len(rows))
+        for row, (item, seconds, detail) in enumerate(rows):
+            self.stats_table.setItem(row, 0, QTableWidgetItem(item))
+            self.stats_table.setItem(row, 1, QTableWidgetItem("" if seconds is None else f"{seconds * 1000:.1f}"))
+            self.stats_table.setItem(row, 2, QTableWidgetItem(detail))
+
+    def on_compilation_finished(self, output_folders, cancelled):
         self.glyph_animator.stop_loop() # Stop animation
+        self.log_pipeline.stop() # Flush sisa log sebelum message box
 
         # Re-enable buttons
         self.btn_add.setEnabled(True)
@@ -331,10 +507,16 @@ class ShrineCompiler(QWidget):
         self.btn_convert.setEnabled(True)
         self.lang_combo.setEnabled(True)
         self.checkbox_open_folder.setEnabled(True)
+        self.btn_cancel.setEnabled(False)
+        self.btn_watch.setEnabled(True)
 
-        QMessageBox.information(self, self.tr("success_message_box_title"), self.tr("success_message_box_message"))
+        if cancelled:
+            # Run dibatalkan: jangan tampilkan sukses atau buka folder yang isinya belum lengkap
+            self.log(self.tr("compilation_cancelled_log"))
+        else:
+            QMessageBox.information(self, self.tr("success_message_box_title"), self.tr("success_message_box_message"))
 
-        if self.checkbox_open_folder.isChecked():
+        if self.checkbox_open_folder.isChecked() and not cancelled:
             for folder_path in output_folders:
                 if os.path.exists(folder_path):
                     QDesktopServices.openUrl(QUrl.fromLocalFile(folder_path))
@@ -348,6 +530,7 @@ class ShrineCompiler(QWidget):
 
     def on_compilation_error(self, message):
         self.glyph_animator.stop_loop() # Stop animation on error
+        self.log_pipeline.stop()
 
         # Re-enable buttons
         self.btn_add.setEnabled(True)
@@ -355,6 +538,8 @@ class ShrineCompiler(QWidget):
         self.btn_convert.setEnabled(True)
         self.lang_combo.setEnabled(True)
         self.checkbox_open_folder.setEnabled(True)
+        self.btn_cancel.setEnabled(False)
+        self.btn_watch.setEnabled(True)
 
         QMessageBox.critical(self, "Error Kompilasi", message)
         
@@ -365,6 +550,7 @@ class ShrineCompiler(QWidget):
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support() # Diperlukan untuk process pool saat dibundel PyInstaller
     app = QApplication(sys.argv)
     compiler = ShrineCompiler()
     compiler.show()